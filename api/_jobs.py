@@ -0,0 +1,160 @@
+import base64
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from _shared import get_app, db, ensure_schema, Job, generate_months, month_snapshot, cached_export
+
+JOB_KINDS = ('generate', 'pdf')
+FINISHED_STATUSES = ('done', 'failed')
+
+# In-process worker pool. It is best effort only: serverless instances are
+# frozen once the 202 is sent, so jobs must also be drained by the CLI worker
+# below (long-running, or --once from cron)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+_executor = None
+
+# A running job whose claim hasn't been renewed for this long is considered
+# abandoned (frozen or killed worker) and may be claimed again
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '120'))
+
+# Claims per job before it is failed instead of retried
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+
+def _run_generate(months, mode='greedy', seed=None):
+    return generate_months(sorted(months), mode, seed)
+
+def _run_pdf(month, renderer='paragraph'):
+    from export_utils import generate_pdf, generate_pdf_fast
+
+    render = generate_pdf_fast if renderer == 'fast' else generate_pdf
+    snapshot = month_snapshot(month)
+    _, schedules = snapshot['schedule']
+    _, preferences = snapshot['preferences']
+    pdf_bytes = cached_export(snapshot, 'pdf', ('doctors', 'schedule', 'preferences'),
+                              lambda: render(month, schedules, preferences), month, renderer)
+    return {
+        'filename': f"micu_schedule_{month}.pdf",
+        'content_base64': base64.b64encode(pdf_bytes).decode('ascii')
+    }
+
+JOB_RUNNERS = {'generate': _run_generate, 'pdf': _run_pdf}
+
+def enqueue(kind, params):
+    """
+    Store a queued job and hand it to the worker pool.
+
+    Returns:
+        The Job row (committed, so other instances can see it)
+    """
+    job = Job(kind=kind, params=params, status='queued')
+    db.session.add(job)
+    db.session.commit()
+
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS)
+    _executor.submit(run_job, job.id)
+    return job
+
+def claimable(now=None):
+    """Filter for jobs a worker may claim: queued, or running on an expired lease."""
+    expired = (now or datetime.utcnow()) - timedelta(seconds=JOB_LEASE_SECONDS)
+    return db.or_(
+        Job.status == 'queued',
+        db.and_(Job.status == 'running', Job.claimed_at < expired)
+    )
+
+def _heartbeat(job_id, stop):
+    """Renew a running job's lease until ``stop`` is set."""
+    while not stop.wait(JOB_LEASE_SECONDS / 3):
+        with get_app().app_context():
+            try:
+                Job.query.filter_by(id=job_id, status='running').update({'claimed_at': datetime.utcnow()})
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+def run_job(job_id):
+    """
+    Claim a job and execute it in its own app context.
+
+    The claim is a conditional UPDATE, so a job is only ever run by one
+    worker even when the pool and a CLI worker race for it. A heartbeat
+    renews the lease while the job runs; if the worker dies, the lease
+    expires and drain_queue claims the job again, up to JOB_MAX_ATTEMPTS.
+    """
+    with get_app().app_context():
+        try:
+            now = datetime.utcnow()
+            claimed = Job.query.filter(Job.id == job_id, claimable(now)).update(
+                {'status': 'running', 'started_at': now, 'claimed_at': now, 'attempts': Job.attempts + 1},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if not claimed:
+                return
+
+            job = Job.query.get(job_id)
+            if job.attempts > JOB_MAX_ATTEMPTS:
+                job.status = 'failed'
+                job.error = f'Abandoned by {JOB_MAX_ATTEMPTS} workers'
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                return
+
+            stop = threading.Event()
+            threading.Thread(target=_heartbeat, args=(job_id, stop), daemon=True).start()
+            try:
+                job.result = JOB_RUNNERS[job.kind](**job.params)
+                job.status = 'done'
+            except Exception as e:
+                db.session.rollback()
+                job = Job.query.get(job_id)
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                stop.set()
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+def wait_for_job(job_id, timeout):
+    """Long-poll: return the job once finished or after ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    while True:
+        db.session.expire_all()
+        job = Job.query.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES or time.monotonic() >= deadline:
+            return job
+        time.sleep(0.5)
+
+def drain_queue(poll_interval=2.0, once=False):
+    """
+    Run claimable jobs oldest first; used by the standalone worker.
+
+    Runs forever, or with ``once`` until nothing is left to claim, which
+    suits a cron-style runner.
+    """
+    with get_app().app_context():
+        ensure_schema()
+    while True:
+        with get_app().app_context():
+            pending = [j.id for j in Job.query.filter(claimable()).order_by(Job.created_at).limit(10)]
+            db.session.remove()
+        for job_id in pending:
+            run_job(job_id)
+        if not pending:
+            if once:
+                return
+            time.sleep(poll_interval)
+
+if __name__ == '__main__':
+    # Standalone worker: DATABASE_URL=... python api/_jobs.py [--once]
+    drain_queue(once='--once' in sys.argv[1:])
@@ -0,0 +1,156 @@
+"""
+Request instrumentation shared by every handler.
+
+Kept free of Flask/SQLAlchemy imports so lightweight handlers can be
+instrumented without paying for them on a cold start.
+"""
+import os
+import json
+import time
+import functools
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+# Phase timings of the request being handled; None outside instrumented handlers
+_trace = ContextVar('trace', default=None)
+
+# Per-endpoint totals since this process started, reported by /api/metrics.
+# Every serverless function is its own process, so these only cover the
+# function serving the metrics request; the log lines below cover them all
+request_metrics = {}
+
+# One JSON line per request (and per kept profile) on stdout, where the
+# platform's log drain collects every function's timings in one place
+METRICS_LOG = os.getenv('METRICS_LOG', '1').lower() not in ('0', 'false', 'no')
+
+# Requests slower than PROFILE_SLOW_MS are kept as cProfile summaries (0 disables profiling)
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', '0'))
+slow_profiles = deque(maxlen=int(os.getenv('PROFILE_KEEP', '5')))
+
+def record_query(elapsed_ms):
+    """Count one database query against the current request."""
+    trace = _trace.get()
+    if trace is not None:
+        trace['queries'] += 1
+        trace['phases']['db'] = trace['phases'].get('db', 0.0) + elapsed_ms
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to the current request's ``name`` phase."""
+    trace = _trace.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace['phases'][name] = trace['phases'].get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+def server_timing(total_ms, trace):
+    """Format a request trace as a Server-Timing header value."""
+    entries = []
+    for name, ms in trace['phases'].items():
+        if name == 'db':
+            entries.append(f'db;dur={ms:.1f};desc="{trace["queries"]} queries"')
+        else:
+            entries.append(f'{name};dur={ms:.1f}')
+    entries.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(entries)
+
+def _with_header(response, name, value):
+    """Add a header to any of the response shapes the handlers return."""
+    if isinstance(response, dict):
+        response.setdefault('headers', {})[name] = value
+    elif hasattr(response, 'headers'):
+        response.headers[name] = value
+    elif isinstance(response, tuple) and len(response) == 2:
+        response = response + ({name: value},)
+    return response
+
+def _record_request(name, total_ms, trace):
+    stats = request_metrics.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0, 'phases': {}})
+    stats['count'] += 1
+    stats['total_ms'] += total_ms
+    stats['max_ms'] = max(stats['max_ms'], total_ms)
+    stats['queries'] += trace['queries']
+    for phase_name, ms in trace['phases'].items():
+        stats['phases'][phase_name] = stats['phases'].get(phase_name, 0.0) + ms
+
+def _emit(kind, **fields):
+    """Write one metrics record as a single JSON log line."""
+    if METRICS_LOG:
+        print(json.dumps({'metric': kind, **fields}, separators=(',', ':')), flush=True)
+
+def _profile_summary(name, total_ms, profiler, limit=25):
+    import io
+    import pstats
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+    return {
+        'endpoint': name,
+        'total_ms': round(total_ms, 1),
+        'at': datetime.utcnow().isoformat(),
+        'profile': out.getvalue()
+    }
+
+def instrumented(name):
+    """
+    Decorate a handler to time its phases, query count and total duration.
+
+    Timings are returned in a Server-Timing header, logged as a JSON line
+    and aggregated for /api/metrics. With PROFILE_SLOW_MS set, each request
+    runs under cProfile and the summary is kept (and logged) when it takes
+    longer than the threshold.
+    """
+    def decorate(handler):
+        @functools.wraps(handler)
+        def wrapper(request):
+            trace = {'queries': 0, 'phases': {}}
+            token = _trace.set(trace)
+            profiler = None
+            if PROFILE_SLOW_MS:
+                import cProfile
+                profiler = cProfile.Profile()
+                try:
+                    profiler.enable()
+                except ValueError:
+                    profiler = None  # Another profiler is active (concurrent request)
+            start = time.perf_counter()
+            try:
+                response = handler(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+                _trace.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+
+            _record_request(name, total_ms, trace)
+            _emit('request', endpoint=name, total_ms=round(total_ms, 2), queries=trace['queries'],
+                  phases={p: round(ms, 2) for p, ms in trace['phases'].items()})
+            if profiler is not None and total_ms >= PROFILE_SLOW_MS:
+                summary = _profile_summary(name, total_ms, profiler)
+                slow_profiles.append(summary)
+                _emit('slow_profile', **summary)
+            return _with_header(response, 'Server-Timing', server_timing(total_ms, trace))
+        return wrapper
+    return decorate
+
+def endpoint_metrics(include_profiles=False):
+    """Per-endpoint averages (ms) since this process started."""
+    endpoints = {}
+    for name, stats in request_metrics.items():
+        count = stats['count']
+        endpoints[name] = {
+            'count': count,
+            'avg_ms': round(stats['total_ms'] / count, 2),
+            'max_ms': round(stats['max_ms'], 2),
+            'avg_queries': round(stats['queries'] / count, 2),
+            'phases_avg_ms': {p: round(ms / count, 2) for p, ms in stats['phases'].items()}
+        }
+    snapshot = {'endpoints': endpoints}
+    if include_profiles:
+        snapshot['slow_profiles'] = list(slow_profiles)
+    return snapshot
+
@@ -0,0 +1,76 @@
+"""
+Raw DB-API access for simple reads.
+
+Health checks and plain list reads don't need Flask, SQLAlchemy or the
+models, so this path skips importing them entirely on a cold start. The
+connection is kept per process and reused by warm invocations.
+"""
+import os
+import time
+from datetime import date, datetime
+
+import psycopg2
+
+from _metrics import record_query
+
+_connection = None
+
+# Base class of every DB-API failure (no server, missing table, ...) raised by this module
+DatabaseError = psycopg2.Error
+
+# Same counters as the SQLAlchemy pool so /api/health reports either path alike
+raw_stats = {'connections': 0, 'checkouts': 0}
+
+def database_url():
+    return os.getenv('DATABASE_URL', os.getenv('SUPABASE_DB_URL', 'postgresql://localhost/micu_scheduler'))
+
+def connect():
+    """Return the process-wide autocommit connection, reconnecting if it was closed."""
+    global _connection
+    if _connection is None or _connection.closed:
+        _connection = psycopg2.connect(database_url(), connect_timeout=20)
+        _connection.autocommit = True
+        raw_stats['connections'] += 1
+    raw_stats['checkouts'] += 1
+    return _connection
+
+def fetch_all(sql, params=None):
+    """
+    Run a read-only query and return the rows as dictionaries.
+
+    Dates and timestamps are returned as ISO strings, matching the models'
+    to_dict output. A connection dropped between invocations is retried once.
+    """
+    for attempt in (1, 2):
+        try:
+            connection = connect()
+            start = time.perf_counter()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                columns = [c.name for c in cursor.description]
+                rows = cursor.fetchall()
+            record_query((time.perf_counter() - start) * 1000)
+            break
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if attempt == 2:
+                raise
+            close()
+
+    return [
+        {c: v.isoformat() if isinstance(v, (date, datetime)) else v for c, v in zip(columns, row)}
+        for row in rows
+    ]
+
+def close():
+    global _connection
+    if _connection is not None and not _connection.closed:
+        _connection.close()
+    _connection = None
+
+def connection_stats():
+    """Return raw connection counters, including how many checkouts reused a connection."""
+    return {
+        'connections': raw_stats['connections'],
+        'checkouts': raw_stats['checkouts'],
+        'reused': raw_stats['checkouts'] - raw_stats['connections']
+    }
@@ -1,11 +1,51 @@
 import os
+import re
+import json
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import date, datetime
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert
+from _metrics import phase, instrumented, record_query, endpoint_metrics
+
+# Optional faster JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Shared database instance
 db = SQLAlchemy()
 
+# Process-wide app reused across warm serverless invocations
+_app = None
+
+# Pool counters: connections opened vs. connections handed out to requests
+pool_stats = {'connections': 0, 'checkouts': 0}
+
+# Set once the schema has been checked in this process
+_schema_verified = False
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'supabase_schema.sql')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'database', 'migrations')
+
+# (table, column the migration adds, file in MIGRATIONS_DIR), applied in order by bootstrap_schema
+MIGRATIONS = [
+    ('preferences', 'unavailable_mask', '001_preference_masks.sql'),
+    ('jobs', 'claimed_at', '002_job_leases.sql'),
+    ('doctors', 'modified_at', '003_doctor_modified_at.sql'),
+    ('schedule', 'revision', '004_schedule_revision.sql'),
+]
+
+# Response formats for row-based read endpoints
+RESPONSE_FORMATS = ('records', 'columns')
+
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
 def create_app():
     """Create and configure Flask app for serverless functions"""
     app = Flask(__name__)
@@ -39,6 +79,52 @@ def create_app():
     
     return app
 
+def get_app():
+    """
+    Return the process-wide Flask app, creating it on the first (cold) call.
+
+    Warm invocations reuse the same app and SQLAlchemy engine, so pooled
+    connections survive between requests instead of reconnecting each time.
+    """
+    global _app
+    if _app is None:
+        with phase('app'):
+            app = create_app()
+            with app.app_context():
+                event.listen(db.engine, 'connect', _count_connection)
+                event.listen(db.engine, 'checkout', _count_checkout)
+                event.listen(db.engine, 'before_cursor_execute', _query_started)
+                event.listen(db.engine, 'after_cursor_execute', _query_finished)
+        _app = app
+    return _app
+
+def _count_connection(dbapi_connection, connection_record):
+    pool_stats['connections'] += 1
+
+def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+    pool_stats['checkouts'] += 1
+
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    record_query((time.perf_counter() - started) * 1000)
+
+def metrics_snapshot(include_profiles=False):
+    """Per-endpoint averages (ms) since the process started, plus pool counters."""
+    snapshot = endpoint_metrics(include_profiles)
+    snapshot['pool'] = connection_stats()
+    return snapshot
+
+def connection_stats():
+    """Return pool counters, including how many checkouts reused a connection."""
+    return {
+        'connections': pool_stats['connections'],
+        'checkouts': pool_stats['checkouts'],
+        'reused': pool_stats['checkouts'] - pool_stats['connections']
+    }
+
 # Models
 class Doctor(db.Model):
     __tablename__ = 'doctors'
@@ -48,6 +134,7 @@ class Doctor(db.Model):
     initials = db.Column(db.String(4), unique=True, nullable=False)
     active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    modified_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     
     def to_dict(self):
         return {
@@ -66,8 +153,11 @@ class Preference(db.Model):
     month = db.Column(db.String(7), nullable=False)  # YYYY-MM format
     unavailable = db.Column(db.ARRAY(db.String), default=[])
     preferred = db.Column(db.ARRAY(db.String), default=[])
+    # Day bitmasks of the arrays above (bit day - 1), see scheduler.encode_days
+    unavailable_mask = db.Column(db.Integer, nullable=False, default=0)
+    preferred_mask = db.Column(db.Integer, nullable=False, default=0)
     desired_shifts = db.Column(db.Integer, default=7)
-    submitted_at = db.Column(db.DateTime, server_default=db.func.now())
+    submitted_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
     
     # Relationships
     doctor = db.relationship('Doctor', backref='preferences')
@@ -81,6 +171,8 @@ class Preference(db.Model):
             'month': self.month,
             'unavailable': self.unavailable or [],
             'preferred': self.preferred or [],
+            'unavailable_mask': self.unavailable_mask,
+            'preferred_mask': self.preferred_mask,
             'desired_shifts': self.desired_shifts,
             'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None
         }
@@ -93,6 +185,8 @@ class Schedule(db.Model):
     month = db.Column(db.String(7), nullable=False)  # YYYY-MM format
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
+    modified_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+    revision = db.Column(db.Integer, nullable=False, default=0)  # bumped on each reassignment
     
     # Relationships
     doctor = db.relationship('Doctor', backref='schedules')
@@ -105,5 +199,669 @@ class Schedule(db.Model):
             'doctor_id': self.doctor_id,
             'doctor_name': self.doctor.name if self.doctor else None,
             'doctor_initials': self.doctor.initials if self.doctor else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'modified_at': self.modified_at.isoformat() if self.modified_at else None,
+            'revision': self.revision
+        }
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # generate | pdf
+    params = db.Column(db.JSON, nullable=False, default={})
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued | running | done | failed
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    # Worker lease, renewed while the job runs; see _jobs.claimable
+    claimed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'attempts': self.attempts
+        }
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload):
+    """Serialize a response body, using orjson when it is installed."""
+    with phase('serialize'):
+        if orjson is not None:
+            return orjson.dumps(payload, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(payload, default=_json_default)
+
+def load_table(query):
+    """Run a column-projected query, returning (field names, tuple rows)."""
+    return [column['name'] for column in query.column_descriptions], query.all()
+
+def encode_rows(table, format='records'):
+    """
+    Serialize (fields, rows) from load_table straight to JSON.
+
+    Args:
+        table: (field names, tuple rows) pair
+        format: 'records' for a list of objects (the to_dict shape) or
+            'columns' for a compact {'columns': [...], 'data': {name: [values]}}
+
+    Returns:
+        JSON string
+    """
+    fields, rows = table
+
+    if format == 'columns':
+        columns = list(zip(*rows)) if rows else [()] * len(fields)
+        return dumps({
+            'columns': fields,
+            'data': {name: list(values) for name, values in zip(fields, columns)}
+        })
+    return dumps([dict(zip(fields, row)) for row in rows])
+
+def omit_fields(table, *names):
+    """Drop columns from a (fields, rows) table, e.g. the date arrays when masks suffice."""
+    fields, rows = table
+    keep = [i for i, name in enumerate(fields) if name not in names]
+    return [fields[i] for i in keep], [tuple(row[i] for i in keep) for row in rows]
+
+def doctor_rows(*criteria):
+    """Column-projected doctor query with Doctor.to_dict keys."""
+    return db.session.query(
+        Doctor.id,
+        Doctor.name,
+        Doctor.initials,
+        Doctor.active,
+        Doctor.created_at
+    ).filter(*criteria)
+
+def schedule_rows(*criteria):
+    """Column-projected schedule query joined to doctors, with Schedule.to_dict keys."""
+    return db.session.query(
+        Schedule.id,
+        Schedule.date,
+        Schedule.month,
+        Schedule.doctor_id,
+        Doctor.name.label('doctor_name'),
+        Doctor.initials.label('doctor_initials'),
+        Schedule.created_at,
+        Schedule.modified_at,
+        Schedule.revision
+    ).outerjoin(Doctor, Schedule.doctor_id == Doctor.id).filter(*criteria)
+
+def preference_rows(*criteria):
+    """Column-projected preference query joined to doctors, with Preference.to_dict keys."""
+    return db.session.query(
+        Preference.id,
+        Preference.doctor_id,
+        Doctor.name.label('doctor_name'),
+        Doctor.initials.label('doctor_initials'),
+        Preference.month,
+        db.func.coalesce(Preference.unavailable, db.literal_column("'{}'"),
+                         type_=Preference.unavailable.type).label('unavailable'),
+        db.func.coalesce(Preference.preferred, db.literal_column("'{}'"),
+                         type_=Preference.preferred.type).label('preferred'),
+        Preference.unavailable_mask,
+        Preference.preferred_mask,
+        Preference.desired_shifts,
+        Preference.submitted_at
+    ).outerjoin(Doctor, Preference.doctor_id == Doctor.id).filter(*criteria)
+
+class MemoryCache:
+    """
+    Bounded in-process LRU cache with a per-entry TTL.
+
+    Backends only need get/set/delete/clear, so a shared cache client can
+    replace this through set_cache_backend without touching the handlers.
+    """
+
+    def __init__(self, max_entries=32, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+# Month snapshots shared by the read and export handlers
+month_cache = MemoryCache(
+    max_entries=int(os.getenv('MONTH_CACHE_SIZE', '32')),
+    ttl=float(os.getenv('MONTH_CACHE_TTL', '60'))
+)
+
+# Rendered PDF/ICS files keyed by the content hash of their inputs
+export_cache = MemoryCache(
+    max_entries=int(os.getenv('EXPORT_CACHE_SIZE', '64')),
+    ttl=float(os.getenv('EXPORT_CACHE_TTL', '3600'))
+)
+
+# Solver results keyed by (preferences, mode, seed); a hit skips the solver
+solver_cache = MemoryCache(
+    max_entries=int(os.getenv('SOLVER_CACHE_SIZE', '16')),
+    ttl=float(os.getenv('SOLVER_CACHE_TTL', '3600'))
+)
+
+def set_cache_backend(backend, export_backend=None):
+    """Swap the snapshot (and optionally export) cache for another get/set/delete/clear backend."""
+    global month_cache, export_cache
+    month_cache = backend
+    if export_backend is not None:
+        export_cache = export_backend
+
+def month_versions(month):
+    """
+    Return a version stamp per table (doctors, preferences, schedule) for a month.
+
+    One aggregate query of row counts and latest change times stands in for
+    the rows themselves. It runs against the database on every read, so a
+    write made by any other serverless function is seen immediately.
+    """
+    def aggregates(*columns, criteria=()):
+        return [db.session.query(c).filter(*criteria).scalar_subquery() for c in columns]
+
+    stamps = db.session.query(
+        *aggregates(db.func.count(Doctor.id), db.func.max(Doctor.modified_at)),
+        *aggregates(db.func.count(Preference.id), db.func.max(Preference.submitted_at),
+                    criteria=[Preference.month == month]),
+        *aggregates(db.func.count(Schedule.id), db.func.max(Schedule.modified_at),
+                    criteria=[Schedule.month == month])
+    ).one()
+    parts = {'doctors': stamps[:2], 'preferences': stamps[2:4], 'schedule': stamps[4:]}
+    return {
+        name: hashlib.sha1(':'.join([month] + [str(v) for v in values]).encode('utf-8')).hexdigest()[:20]
+        for name, values in parts.items()
+    }
+
+def month_snapshot(month, versions=None):
+    """
+    Return the cached doctors, preferences and schedule for a month.
+
+    Each table is a (fields, rows) pair from load_table; rows expose their
+    columns as attributes. ``versions`` holds month_versions for ETags and
+    export keys. A cached snapshot is only reused while its versions still
+    match the database, so writes from other processes never serve stale
+    rows; a mismatch or miss reloads all three tables.
+    """
+    if versions is None:
+        versions = month_versions(month)
+    key = f'month:{month}'
+    snapshot = month_cache.get(key)
+    if snapshot is None or snapshot['versions'] != versions:
+        snapshot = {
+            'doctors': load_table(doctor_rows().order_by(Doctor.name)),
+            'preferences': load_table(preference_rows(Preference.month == month).order_by(Preference.id)),
+            'schedule': load_table(schedule_rows(Schedule.month == month).order_by(Schedule.date)),
+            'versions': versions
+        }
+        month_cache.set(key, snapshot)
+    return snapshot
+
+def month_etag(versions, tables, *variant):
+    """
+    ETag for a month's response built from ``tables``, from month_versions,
+    varied by e.g. response format. Responses that embed doctor names or
+    initials from the join must list 'doctors' too.
+    """
+    return '"' + '-'.join(tuple(versions[t] for t in tables) + variant) + '"'
+
+def cached_export(snapshot, kind, tables, render, *variant):
+    """
+    Return a rendered export, rebuilding it only when its inputs change.
+
+    The key combines the snapshot content hashes of ``tables``, so a new
+    schedule or preference set misses the cache without explicit
+    invalidation and stale renders simply age out.
+    """
+    key = ':'.join(('export', kind) + variant + tuple(snapshot['versions'][t] for t in tables))
+    return cached_render(key, render)
+
+def cached_render(key, render):
+    """Return export_cache[key], calling render() to fill it on a miss."""
+    rendered = export_cache.get(key)
+    if rendered is None:
+        with phase('render'):
+            rendered = render()
+        export_cache.set(key, rendered)
+    return rendered
+
+def invalidate_month(*months):
+    """
+    Drop this process's cached snapshots after a write; with no months, drop
+    every snapshot. Only frees memory early: other processes notice the
+    write through month_versions.
+    """
+    if not months:
+        month_cache.clear()
+    for month in months:
+        month_cache.delete(f'month:{month}')
+
+def schedule_version(*criteria):
+    """
+    Return (ETag, last modified) for the schedule rows matching ``criteria``.
+
+    One aggregate query stands in for the rows themselves: reassignments
+    bump modified_at and removals change the count.
+    """
+    count, latest = db.session.query(
+        db.func.count(Schedule.id), db.func.max(Schedule.modified_at)
+    ).filter(*criteria).one()
+    stamp = f'{count}:{latest}'
+    return '"' + hashlib.sha1(stamp.encode('utf-8')).hexdigest()[:20] + '"', latest
+
+def etag_matches(request, etag):
+    """True when the request's If-None-Match already names ``etag``."""
+    headers = getattr(request, 'headers', None) or {}
+    if_none_match = headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+def bootstrap_schema():
+    """
+    One-time schema bootstrap, run from the CLI before deploying.
+
+    An empty database gets the full database/supabase_schema.sql (tables,
+    indexes, triggers and seed doctors); a database missing only some tables
+    gets those tables created from the models. Existing tables only get the
+    migrations in MIGRATIONS whose column is still missing.
+
+    Returns:
+        'verified', 'created' or 'migrated'
+    """
+    global _schema_verified
+    tables = [Doctor.__tablename__, Preference.__tablename__, Schedule.__tablename__, Job.__tablename__]
+    existing = set(inspect(db.engine).get_table_names())
+
+    if all(t in existing for t in tables):
+        status = 'verified'
+    elif not any(t in existing for t in tables):
+        _run_sql_file(SCHEMA_PATH)
+        status = 'created'
+    else:
+        db.create_all()
+        status = 'migrated'
+
+    if status != 'created':
+        inspector = inspect(db.engine)
+        for table, column, filename in MIGRATIONS:
+            if table in existing and column not in {c['name'] for c in inspector.get_columns(table)}:
+                _run_sql_file(os.path.join(MIGRATIONS_DIR, filename))
+                status = 'migrated'
+
+    _schema_verified = True
+    return status
+
+def _run_sql_file(path):
+    """Execute a multi-statement SQL file through a raw DBAPI connection."""
+    with open(path) as f:
+        sql = f.read()
+    connection = db.engine.raw_connection()
+    try:
+        connection.cursor().execute(sql)
+        connection.commit()
+    finally:
+        connection.close()
+
+def ensure_schema():
+    """Check the schema at most once per process; warm requests skip the catalog."""
+    if not _schema_verified:
+        bootstrap_schema()
+
+class MonthBusy(RuntimeError):
+    """Another transaction holds the schedule lock for a month"""
+
+def lock_months(*months):
+    """
+    Take transaction-scoped advisory locks on the given months' schedules.
+
+    Uses pg_try_advisory_xact_lock so a second writer fails immediately,
+    before spending any solver time, instead of losing on UNIQUE(date) at
+    commit. Locks are released on commit or rollback. No-op off Postgres.
+
+    Raises:
+        MonthBusy: A month is already locked by another transaction
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    # Sorted so overlapping horizons always lock in the same order
+    for month in sorted(set(months)):
+        acquired = db.session.execute(
+            db.text('SELECT pg_try_advisory_xact_lock(hashtext(:key))'),
+            {'key': f'schedule:{month}'}
+        ).scalar()
+        if not acquired:
+            db.session.rollback()
+            raise MonthBusy(f'Schedule for {month} is already being updated, try again shortly')
+
+def row_doctor_key(row):
+    """
+    The doctor a bulk-import row refers to: an int ID, upper-cased initials
+    or None. Reads doctor_id, doctor or doctor_initials (the CSV export column).
+    """
+    key = row.get('doctor_id') or row.get('doctor') or row.get('doctor_initials')
+    if isinstance(key, int):
+        return key
+    if isinstance(key, str) and key.strip():
+        key = key.strip()
+        return int(key) if key.isdigit() else key.upper()
+    return None
+
+def validate_preference_row(row, default_month, doctors_by_id, doctors_by_initials):
+    """
+    Check one bulk preference row (JSON object or CSV record) against
+    prefetched doctors.
+
+    Dates may be lists or, from CSV, one cell separated by ';' or spaces;
+    day bitmasks are accepted in place of either list.
+
+    Returns:
+        (upsert_preferences values, None) or (None, error message)
+    """
+    from scheduler import decode_days
+
+    if not isinstance(row, dict):
+        return None, 'Row must be an object'
+
+    key = row_doctor_key(row)
+    doctor = doctors_by_id.get(key) if isinstance(key, int) else doctors_by_initials.get(key)
+    if not doctor:
+        return None, f'Doctor not found: {key}'
+
+    month = row.get('month') or default_month
+    if not isinstance(month, str) or not MONTH_PATTERN.match(month):
+        return None, 'month must be YYYY-MM'
+
+    desired_shifts = row.get('desired_shifts')
+    if desired_shifts in (None, ''):
+        return None, 'desired_shifts is required'
+    # CSV cells arrive as text; JSON counts must be integers (not floats or booleans)
+    if isinstance(desired_shifts, str) and desired_shifts.strip().isdigit():
+        desired_shifts = int(desired_shifts)
+    if not isinstance(desired_shifts, int) or isinstance(desired_shifts, bool):
+        return None, 'desired_shifts must be an integer'
+    if not 0 <= desired_shifts <= 31:
+        return None, 'desired_shifts must be between 0 and 31'
+
+    values = {'doctor_id': doctor.id, 'month': month, 'desired_shifts': desired_shifts}
+    for kind in ('unavailable', 'preferred'):
+        dates = row.get(kind)
+        if isinstance(dates, str):
+            dates = [d for d in re.split(r'[;,\s]+', dates) if d]
+        if not dates and row.get(f'{kind}_mask') not in (None, ''):
+            mask = row[f'{kind}_mask']
+            try:
+                # CSV cells arrive as text; JSON masks must already be integers
+                dates = decode_days(month, int(mask) if isinstance(mask, str) and mask.strip().isdigit() else mask)
+            except (TypeError, ValueError) as e:
+                return None, f'{kind}_mask: {str(e)}'
+        dates = dates or []
+        if not isinstance(dates, list) or not all(isinstance(d, str) for d in dates):
+            return None, f'{kind} must be a list of YYYY-MM-DD dates'
+        for date_str in dates:
+            try:
+                valid = date.fromisoformat(date_str).strftime('%Y-%m') == month
+            except (TypeError, ValueError):
+                valid = False
+            if not valid:
+                return None, f'{kind} date {date_str} is not a YYYY-MM-DD date in {month}'
+        values[kind] = sorted(set(dates))
+
+    return values, None
+
+def upsert_doctors(rows):
+    """
+    Write doctor rows (name, initials, active) with a single
+    INSERT ... ON CONFLICT (initials) DO UPDATE.
+
+    Returns:
+        Number of rows written
+    """
+    if not rows:
+        return 0
+
+    stmt = insert(Doctor).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Doctor.initials],
+        set_={'name': stmt.excluded.name, 'active': stmt.excluded.active, 'modified_at': db.func.now()}
+    )
+    db.session.execute(stmt)
+    return len(rows)
+
+def upsert_preferences(rows, if_unmodified_since=None):
+    """
+    Write preference rows with a single
+    INSERT ... ON CONFLICT (doctor_id, month) DO UPDATE.
+
+    Args:
+        rows: Dictionaries with doctor_id, month, unavailable, preferred
+            and desired_shifts; day bitmasks are filled in from the arrays
+        if_unmodified_since: Optional datetime; existing rows submitted
+            after it are left untouched (optimistic concurrency)
+
+    Returns:
+        Dictionary mapping (doctor_id, month) to preference id for the rows
+        actually written
+    """
+    from scheduler import encode_days
+
+    if not rows:
+        return {}
+
+    rows = [
+        dict(row,
+             unavailable_mask=encode_days(row['month'], row['unavailable']),
+             preferred_mask=encode_days(row['month'], row['preferred']))
+        for row in rows
+    ]
+    stmt = insert(Preference).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Preference.doctor_id, Preference.month],
+        set_={
+            'unavailable': stmt.excluded.unavailable,
+            'preferred': stmt.excluded.preferred,
+            'unavailable_mask': stmt.excluded.unavailable_mask,
+            'preferred_mask': stmt.excluded.preferred_mask,
+            'desired_shifts': stmt.excluded.desired_shifts,
+            'submitted_at': db.func.now()
+        },
+        where=(Preference.submitted_at <= if_unmodified_since) if if_unmodified_since else None
+    ).returning(Preference.id, Preference.doctor_id, Preference.month)
+
+    return {(r.doctor_id, r.month): r.id for r in db.session.execute(stmt)}
+
+def upsert_schedule(assignments, existing=None):
+    """
+    Write {date: doctor_id} assignments with a single
+    INSERT ... ON CONFLICT (date) DO UPDATE, skipping dates whose doctor
+    already matches ``existing``. A row's revision goes up only when its
+    doctor actually changes.
+
+    Returns:
+        Dictionary with inserted, updated and unchanged counts
+    """
+    existing = existing or {}
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    rows = []
+
+    for date_str, doctor_id in assignments.items():
+        if not doctor_id:  # Only save assigned dates
+            continue
+        if existing.get(date_str) == doctor_id:
+            counts['unchanged'] += 1
+            continue
+
+        counts['updated' if date_str in existing else 'inserted'] += 1
+        rows.append({
+            'date': date.fromisoformat(date_str),
+            'month': date_str[:7],
+            'doctor_id': doctor_id
+        })
+
+    if rows:
+        stmt = insert(Schedule).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Schedule.date],
+            set_={
+                'doctor_id': stmt.excluded.doctor_id,
+                'month': stmt.excluded.month,
+                'modified_at': db.func.now(),
+                'revision': db.case((Schedule.doctor_id != stmt.excluded.doctor_id, Schedule.revision + 1),
+                                    else_=Schedule.revision)
+            }
+        )
+        db.session.execute(stmt)
+
+    return counts
+
+def solver_key(months, mode, seed, preferences_by_month):
+    """
+    Hash of the preferences, mode and seed a solve ran with (not ids or
+    timestamps). A seed of None names the latest solve with any seed.
+    """
+    inputs = {
+        'months': months,
+        'mode': mode,
+        'seed': seed,
+        'preferences': {
+            m: [(p['doctor_id'], p['desired_shifts'], sorted(p['unavailable']), sorted(p['preferred']))
+                for p in prefs]
+            for m, prefs in preferences_by_month.items()
+        }
+    }
+    return 'solve:' + hashlib.sha1(json.dumps(inputs).encode()).hexdigest()
+
+def generate_months(months, mode='greedy', seed=None):
+    """
+    Solve a month (or multi-month horizon) and save it in one transaction.
+
+    Shared by /api/generate and the background job worker. A random seed is
+    drawn when none is given and returned, so any run can be reproduced.
+    Repeating a run with unchanged preferences and mode (and the same seed,
+    or none) reuses the memoized result instead of solving again, as long
+    as the month's schedule is still the one that solve started from or
+    produced.
+
+    Returns:
+        Response dictionary with the schedule, score and write counts
+
+    Raises:
+        LookupError: A month of the horizon has no preferences
+        MonthBusy: Another request is already generating one of the months
+    """
+    import secrets
+    from sqlalchemy.orm import joinedload
+    from scheduler import generate_schedule, generate_horizon, schedule_score
+
+    # Claim the months before solving so concurrent generators fail fast
+    lock_months(*months)
+
+    # Get preferences for every month of the horizon, in a stable order for reproducible tie-breaking
+    preferences = Preference.query.options(joinedload(Preference.doctor)).filter(
+        Preference.month.in_(months)
+    ).order_by(Preference.id).all()
+    missing = [m for m in months if m not in {p.month for p in preferences}]
+    if missing:
+        raise LookupError(f"No preferences found for {', '.join(missing)}")
+
+    # Get existing schedule
+    existing_schedule = {}
+    existing_assignments = Schedule.query.filter(Schedule.month.in_(months)).all()
+    for assignment in existing_assignments:
+        existing_schedule[assignment.date.strftime('%Y-%m-%d')] = assignment.doctor_id
+
+    # Convert preferences to the format expected by scheduler, grouped by month
+    preferences_by_month = {m: [] for m in months}
+    with phase('convert'):
+        for p in preferences:
+            preferences_by_month[p.month].append(p.to_dict())
+
+    # Existing nights are kept by the solver, so a memoized result only applies
+    # to the schedule it started from or, on a rerun, the one it wrote
+    memoized = solver_cache.get(solver_key(months, mode, seed, preferences_by_month))
+    if memoized is not None and existing_schedule not in (memoized['existing'], memoized['schedule']):
+        memoized = None
+    if memoized is not None:
+        seed, new_schedule, shift_totals = memoized['seed'], memoized['schedule'], memoized['shift_totals']
+    else:
+        if seed is None:
+            seed = secrets.randbelow(2 ** 31)
+        with phase('solver'):
+            if len(months) == 1:
+                new_schedule = generate_schedule(months[0], preferences_by_month[months[0]],
+                                                 existing_schedule, mode=mode, seed=seed)
+                shift_totals = None
+            else:
+                result = generate_horizon(months, {'MICU': preferences_by_month},
+                                          {'MICU': existing_schedule}, mode=mode, seed=seed)['MICU']
+                new_schedule = result['schedule']
+                shift_totals = result['shift_totals']
+        entry = {'seed': seed, 'existing': existing_schedule, 'schedule': new_schedule, 'shift_totals': shift_totals}
+        solver_cache.set(solver_key(months, mode, seed, preferences_by_month), entry)
+        solver_cache.set(solver_key(months, mode, None, preferences_by_month), entry)
+
+    # Upsert only the changed nights; all months are written in one transaction
+    with phase('write'):
+        write_counts = upsert_schedule(new_schedule, existing_schedule)
+        db.session.commit()
+    invalidate_month(*months)
+
+    score = sum(
+        schedule_score({d: doc for d, doc in new_schedule.items() if d.startswith(m)},
+                       preferences_by_month[m])
+        for m in months
+    )
+    response = {
+        'message': 'Schedule generated successfully',
+        'mode': mode,
+        'seed': seed,
+        'memoized': memoized is not None,
+        'score': score,
+        'assignments': len(new_schedule),
+        'written': write_counts,
+        'schedule': new_schedule
+    }
+    if shift_totals is not None:
+        response['months'] = months
+        response['shift_totals'] = shift_totals
+    return response
+
+
+if __name__ == '__main__':
+    # One-time schema bootstrap: DATABASE_URL=... python api/_shared.py
+    with get_app().app_context():
+        print(f"Schema {bootstrap_schema()}")
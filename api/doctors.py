@@ -1,16 +1,37 @@
 import json
 import urllib.parse
+from _metrics import instrumented
 
+@instrumented('doctors')
 def handler(request):
     """Handle doctor-related operations"""
     try:
-        from _shared import create_app, db, Doctor
+        if request.method == 'GET':
+            # Plain list read: raw DB-API path, no Flask/SQLAlchemy import on a cold start
+            active_only = request.args.get('active', 'true').lower() == 'true'
+            from _raw import fetch_all, DatabaseError
+            try:
+                doctors = fetch_all(
+                    'SELECT id, name, initials, active, created_at FROM doctors'
+                    + (' WHERE active' if active_only else '')
+                    + ' ORDER BY name'
+                )
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps(doctors)
+                }
+            except DatabaseError as e:
+                # e.g. schema not created yet; the ORM path below bootstraps it
+                print(f"doctors: raw read failed, using the ORM path: {e}", flush=True)
+        
+        from _shared import get_app, db, ensure_schema, invalidate_month, Doctor
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
-            # Ensure tables exist
-            db.create_all()
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
             
             if request.method == 'GET':
                 # Get all doctors
@@ -61,6 +82,8 @@ def handler(request):
                 try:
                     db.session.add(doctor)
                     db.session.commit()
+                    # Every cached month lists the doctor roster
+                    invalidate_month()
                     return {
                         'statusCode': 201,
                         'headers': {'Content-Type': 'application/json'},
@@ -1,14 +1,19 @@
 import json
 import urllib.parse
+from _metrics import instrumented
 
+@instrumented('doctors/activate')
 def handler(request):
     """Activate a doctor"""
     try:
-        from _shared import create_app, db, Doctor
+        from _shared import get_app, db, ensure_schema, invalidate_month, Doctor
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
             # Get doctor ID from query parameters
             doctor_id = None
             if hasattr(request, 'args'):
@@ -41,6 +46,8 @@ def handler(request):
                 doctor.active = True
                 try:
                     db.session.commit()
+                    # Every cached month lists the doctor roster
+                    invalidate_month()
                     return {
                         'statusCode': 200,
                         'headers': {'Content-Type': 'application/json'},
@@ -0,0 +1,62 @@
+from flask import request, Response
+from _shared import get_app, instrumented, db, ensure_schema, doctor_rows, schedule_rows, schedule_version, etag_matches, Doctor, Schedule
+from export_utils import iter_ics, doctor_summary, unit_summary
+from datetime import date, timedelta, timezone
+from email.utils import format_datetime
+
+app = get_app()
+
+# Nights older than this drop out of subscribed calendars
+FEED_HISTORY_DAYS = 90
+
+def stream_feed(criteria, calendar_name, summary, doctor_initials):
+    """Stream the feed's calendar from a server-side cursor"""
+    # The response body is produced after the handler returns, so it needs its own context
+    with app.app_context():
+        schedules = schedule_rows(*criteria).order_by(Schedule.date).yield_per(500)
+        yield from iter_ics(calendar_name, schedules, summary, doctor_initials)
+
+@instrumented('export/feed')
+def handler(request):
+    """Subscribable ICS feed for one doctor (?doctor=XX) or the whole unit"""
+    with app.app_context():
+        # Ensure tables exist (checked once per process)
+        ensure_schema()
+        
+        if request.method == 'GET':
+            doctor_initials = request.args.get('doctor')
+            
+            try:
+                criteria = [Schedule.date >= date.today() - timedelta(days=FEED_HISTORY_DAYS)]
+                
+                if doctor_initials:
+                    doctor = doctor_rows(Doctor.initials == doctor_initials).first()
+                    if not doctor:
+                        return {'error': 'Doctor not found'}, 404
+                    criteria.append(Schedule.doctor_id == doctor.id)
+                    calendar_name = f"MICU Night Shifts - {doctor.name}"
+                    summary = doctor_summary
+                else:
+                    calendar_name = "MICU Night Shifts"
+                    summary = unit_summary
+                
+                # Polling clients with an up-to-date copy get a 304 from one aggregate query
+                etag, last_modified = schedule_version(*criteria)
+                headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                if last_modified:
+                    if last_modified.tzinfo is None:
+                        last_modified = last_modified.replace(tzinfo=timezone.utc)
+                    headers['Last-Modified'] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+                
+                if etag_matches(request, etag):
+                    return Response(status=304, headers=headers)
+                
+                return Response(stream_feed(criteria, calendar_name, summary, doctor_initials),
+                                mimetype='text/calendar',
+                                headers=headers)
+                
+            except Exception as e:
+                return {'error': f'Failed to generate feed: {str(e)}'}, 500
+        
+        else:
+            return {'error': 'Method not allowed'}, 405
@@ -1,34 +1,71 @@
-from flask import request, send_file
-from _shared import create_app, db, Schedule, Doctor
-from export_utils import generate_ics
+from flask import request, send_file, Response
+from _shared import get_app, instrumented, db, ensure_schema, month_snapshot, cached_export, doctor_rows, schedule_rows, Doctor, Schedule
+from export_utils import generate_ics, iter_ics, doctor_summary
+from datetime import date
 import io
 
-app = create_app()
+app = get_app()
 
+def stream_ics(doctor, start, end):
+    """Stream a doctor's calendar for a date range straight from a server-side cursor"""
+    # The response body is produced after the handler returns, so it needs its own context
+    with app.app_context():
+        schedules = schedule_rows(
+            Schedule.doctor_id == doctor.id,
+            Schedule.date >= start,
+            Schedule.date <= end
+        ).order_by(Schedule.date).yield_per(500)
+        yield from iter_ics(f"MICU Night Shifts - {doctor.name}", schedules, doctor_summary, doctor.initials)
+
+@instrumented('export/ics')
 def handler(request):
-    """Export individual doctor schedule as ICS"""
+    """Export individual doctor schedule as ICS for a month or a start/end date range"""
     with app.app_context():
+        # Ensure tables exist (checked once per process)
+        ensure_schema()
+        
         if request.method == 'GET':
             month = request.args.get('month')
+            start = request.args.get('start')
+            end = request.args.get('end')
             doctor_initials = request.args.get('doctor')
             
-            if not month or not doctor_initials:
-                return {'error': 'Month and doctor parameters are required'}, 400
+            if not doctor_initials or not (month or (start and end)):
+                return {'error': 'Doctor and either month or start/end parameters are required'}, 400
             
             try:
+                if not month:
+                    # Date ranges can span years, so stream instead of building the file in memory
+                    try:
+                        start, end = date.fromisoformat(start), date.fromisoformat(end)
+                    except ValueError:
+                        return {'error': 'Start and end must be YYYY-MM-DD dates'}, 400
+                    
+                    doctor = doctor_rows(Doctor.initials == doctor_initials).first()
+                    if not doctor:
+                        return {'error': 'Doctor not found'}, 404
+                    
+                    filename = f"micu_schedule_{doctor_initials}_{start}_{end}.ics"
+                    return Response(stream_ics(doctor, start, end),
+                                    mimetype='text/calendar',
+                                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+                
+                snapshot = month_snapshot(month)
+                
                 # Find doctor by initials
-                doctor = Doctor.query.filter_by(initials=doctor_initials).first()
+                _, doctors = snapshot['doctors']
+                doctor = next((d for d in doctors if d.initials == doctor_initials), None)
                 if not doctor:
                     return {'error': 'Doctor not found'}, 404
                 
                 # Get schedules for this doctor in this month
-                schedules = Schedule.query.filter_by(
-                    month=month, 
-                    doctor_id=doctor.id
-                ).all()
+                _, schedules = snapshot['schedule']
+                schedules = [s for s in schedules if s.doctor_id == doctor.id]
                 
-                # Generate ICS
-                ics_content = generate_ics(month, doctor.name, schedules)
+                # Generate ICS, reusing the last render while the month is unchanged
+                ics_content = cached_export(snapshot, 'ics', ('doctors', 'schedule'),
+                                            lambda: generate_ics(doctor, schedules, month),
+                                            month, doctor_initials)
                 
                 # Return as file
                 output = io.BytesIO(ics_content.encode('utf-8'))
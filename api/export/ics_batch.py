@@ -0,0 +1,45 @@
+from flask import request, send_file
+from _shared import get_app, instrumented, db, ensure_schema, month_snapshot, cached_export
+from export_utils import generate_ics_archive
+import io
+
+app = get_app()
+
+@instrumented('export/ics_batch')
+def handler(request):
+    """Export every doctor's ICS plus the unit calendar as one ZIP"""
+    with app.app_context():
+        # Ensure tables exist (checked once per process)
+        ensure_schema()
+        
+        if request.method == 'GET':
+            month = request.args.get('month')
+            
+            if not month:
+                return {'error': 'Month parameter is required'}, 400
+            
+            try:
+                # Doctors and the month's schedule are loaded once for all calendars
+                snapshot = month_snapshot(month)
+                _, doctors = snapshot['doctors']
+                _, schedules = snapshot['schedule']
+                
+                archive = cached_export(snapshot, 'ics-zip', ('doctors', 'schedule'),
+                                        lambda: generate_ics_archive(doctors, schedules, month),
+                                        month)
+                
+                # Return as file
+                output = io.BytesIO(archive)
+                output.seek(0)
+                
+                filename = f"micu_schedule_{month}_calendars.zip"
+                return send_file(output, 
+                               mimetype='application/zip', 
+                               as_attachment=True,
+                               download_name=filename)
+                
+            except Exception as e:
+                return {'error': f'Failed to generate ICS archive: {str(e)}'}, 500
+        
+        else:
+            return {'error': 'Method not allowed'}, 405
@@ -1,33 +1,60 @@
 from flask import request, send_file
-from _shared import create_app, db, Schedule, Preference
-from export_utils import generate_pdf
+from _shared import get_app, instrumented, db, ensure_schema, month_snapshot, cached_export, cached_render
+from export_utils import generate_pdf, generate_pdf_fast, generate_pdf_booklet
 import io
 
-app = create_app()
+app = get_app()
 
+# 'paragraph' is the platypus layout; 'fast' draws the grid directly on the canvas
+PDF_RENDERERS = {'paragraph': generate_pdf, 'fast': generate_pdf_fast}
+
+@instrumented('export/pdf')
 def handler(request):
-    """Export schedule as PDF"""
+    """Export schedule as PDF, or a multi-month booklet via ?months="""
     with app.app_context():
+        # Ensure tables exist (checked once per process)
+        ensure_schema()
+        
         if request.method == 'GET':
             month = request.args.get('month')
-            if not month:
+            months = request.args.get('months')
+            renderer = request.args.get('renderer', 'paragraph')
+            if not month and not months:
                 return {'error': 'Month parameter is required'}, 400
+            if renderer not in PDF_RENDERERS:
+                return {'error': f"Renderer must be one of: {', '.join(PDF_RENDERERS)}"}, 400
             
             try:
-                # Get all schedules for the month
-                schedules = Schedule.query.filter_by(month=month).all()
-                
-                # Get all preferences for highlighting
-                preferences = Preference.query.filter_by(month=month).all()
-                
-                # Generate PDF
-                pdf_bytes = generate_pdf(month, schedules, preferences)
+                if months:
+                    # Booklets always use the canvas renderer, one page per month
+                    months = sorted({m.strip() for m in months.split(',') if m.strip()})
+                    pages = []
+                    versions = []
+                    for m in months:
+                        snapshot = month_snapshot(m)
+                        pages.append((m, snapshot['schedule'][1], snapshot['preferences'][1]))
+                        # Pages print doctor initials from the join, so renames must miss the cache too
+                        versions.extend(snapshot['versions'][t] for t in ('doctors', 'schedule', 'preferences'))
+                    
+                    pdf_bytes = cached_render(':'.join(['export', 'pdf-booklet'] + months + versions),
+                                              lambda: generate_pdf_booklet(pages))
+                    filename = f"micu_schedule_{months[0]}_to_{months[-1]}.pdf"
+                else:
+                    # Schedule and preferences (for highlighting) from the month snapshot
+                    snapshot = month_snapshot(month)
+                    _, schedules = snapshot['schedule']
+                    _, preferences = snapshot['preferences']
+                    
+                    # Generate PDF, reusing the last render while the month is unchanged
+                    render = PDF_RENDERERS[renderer]
+                    pdf_bytes = cached_export(snapshot, 'pdf', ('doctors', 'schedule', 'preferences'),
+                                              lambda: render(month, schedules, preferences), month, renderer)
+                    filename = f"micu_schedule_{month}.pdf"
                 
                 # Return as file
                 output = io.BytesIO(pdf_bytes)
                 output.seek(0)
                 
-                filename = f"micu_schedule_{month}.pdf"
                 return send_file(output, 
                                mimetype='application/pdf', 
                                as_attachment=True,
@@ -1,44 +1,188 @@
-from datetime import datetime, timedelta
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import calendar
+import csv
+import io
+import zipfile
 from io import BytesIO
 
-def generate_ics(doctor, schedules, month):
-    """Generate ICS calendar file for a doctor's schedule."""
-    ics_lines = [
+def fold_ics_line(line):
+    """Fold a content line at 75 octets and terminate it with CRLF (RFC 5545 3.1)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # Continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+def _as_utc(value):
+    # Naive timestamps come from the database session, which runs in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def ics_timestamp(value):
+    """Format a datetime as an ICS UTC date-time (YYYYMMDDTHHMMSSZ)."""
+    return _as_utc(value).strftime('%Y%m%dT%H%M%SZ')
+
+def iter_ics(calendar_name, schedules, summary, doctor_initials=None):
+    """
+    Yield a calendar as folded CRLF lines, one all-day event per schedule row.
+    
+    ``schedules`` may be any iterable (e.g. a streamed query), so memory
+    stays flat regardless of how many nights the calendar covers. UIDs are
+    scoped to the calendar (the unit, or ``doctor_initials``), so a client
+    subscribed to both sees a night as two events rather than one.
+    """
+    scope = f"dr-{doctor_initials.lower()}" if doctor_initials else "unit"
+    generated = ics_timestamp(datetime.now(timezone.utc))
+    header = [
         "BEGIN:VCALENDAR",
         "VERSION:2.0",
         "PRODID:-//MICU Scheduler//EN",
         "CALSCALE:GREGORIAN",
         "METHOD:PUBLISH",
-        f"X-WR-CALNAME:MICU Night Shifts - {doctor.name}",
+        f"X-WR-CALNAME:{calendar_name}",
         "X-WR-TIMEZONE:America/Chicago",
     ]
+    for line in header:
+        yield fold_ics_line(line)
     
     for schedule in schedules:
         date = schedule.date
-        # Create all-day event
-        ics_lines.extend([
+        # Create all-day event; the UID is keyed on the night, not the row id,
+        # so regenerated schedules update events instead of duplicating them
+        modified = getattr(schedule, 'modified_at', None)
+        event = [
             "BEGIN:VEVENT",
-            f"UID:{schedule.id}@micu-scheduler",
+            f"UID:{date.strftime('%Y%m%d')}-{scope}-micu-night@micu-scheduler",
             f"DTSTART;VALUE=DATE:{date.strftime('%Y%m%d')}",
             f"DTEND;VALUE=DATE:{(date + timedelta(days=1)).strftime('%Y%m%d')}",
-            f"SUMMARY:MICU Night Shift",
+            # DTSTAMP is required (RFC 5545 3.6.1); fall back to generation time
+            f"DTSTAMP:{ics_timestamp(modified) if modified else generated}",
+        ]
+        if modified:
+            event.append(f"LAST-MODIFIED:{ics_timestamp(modified)}")
+        event.extend([
+            f"SEQUENCE:{getattr(schedule, 'revision', None) or 0}",
+            f"SUMMARY:{summary(schedule)}",
             f"DESCRIPTION:Night shift at Rush University Medical Center MICU",
             f"LOCATION:Rush University Medical Center - MICU",
             "STATUS:CONFIRMED",
             "END:VEVENT"
         ])
+        for line in event:
+            yield fold_ics_line(line)
     
-    ics_lines.append("END:VCALENDAR")
-    return "\n".join(ics_lines)
+    yield fold_ics_line("END:VCALENDAR")
+
+def _ics_calendar(calendar_name, schedules, summary, doctor_initials=None):
+    """Build ICS calendar text with one all-day event per schedule row."""
+    return "".join(iter_ics(calendar_name, schedules, summary, doctor_initials))
+
+def doctor_summary(schedule):
+    return "MICU Night Shift"
+
+def unit_summary(schedule):
+    return f"MICU Night Shift - {schedule.doctor_initials}"
+
+def generate_ics(doctor, schedules, month):
+    """Generate ICS calendar file for a doctor's schedule."""
+    return _ics_calendar(f"MICU Night Shifts - {doctor.name}", schedules, doctor_summary, doctor.initials)
+
+def generate_unit_ics(schedules, month):
+    """Generate one ICS calendar with every doctor's nights for the unit."""
+    return _ics_calendar(f"MICU Night Shifts - {month}", schedules, unit_summary)
+
+def generate_ics_archive(doctors, schedules, month):
+    """
+    Build a ZIP of per-doctor ICS files plus the combined unit calendar.
+    
+    Schedules are grouped by doctor in a single pass, so the month's rows
+    are read once regardless of how many doctors are exported.
+    """
+    by_doctor = {}
+    for schedule in schedules:
+        by_doctor.setdefault(schedule.doctor_id, []).append(schedule)
+    
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for doctor in doctors:
+            if doctor.id in by_doctor:
+                archive.writestr(f"micu_schedule_{doctor.initials}_{month}.ics",
+                                 generate_ics(doctor, by_doctor[doctor.id], month))
+        archive.writestr(f"micu_schedule_{month}.ics", generate_unit_ics(schedules, month))
+    
+    return buffer.getvalue()
+
+def _csv_value(value):
+    if isinstance(value, (list, tuple)):
+        return ';'.join(str(v) for v in value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return '' if value is None else value
+
+def iter_csv(fields, rows, chunk_size=64 * 1024):
+    """
+    Yield a CSV file in chunks of roughly ``chunk_size`` characters.
+    
+    ``rows`` may be any iterable of tuples aligned with ``fields`` (e.g. a
+    streamed query), so memory stays flat however many rows are exported.
+    List values (preference dates) are joined with ';'.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+def iter_csv_records(stream):
+    """
+    Yield (line number, record) pairs from a binary CSV stream.
+    
+    Header names are lower-cased and values stripped; the stream is decoded
+    incrementally, so an upload is never held in memory as a whole.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    for record in reader:
+        yield reader.line_num, {k.strip().lower(): (v or '').strip() for k, v in record.items() if k}
+
+def marked_days(pref, kind):
+    """Days of month a preference row marks as ``kind``, read from its day bitmask when loaded."""
+    # Imported here so the ICS and CSV exports don't load the solver (and multiprocessing)
+    from scheduler import mask_days
+    
+    mask = getattr(pref, f'{kind}_mask', None)
+    if mask is not None:
+        return mask_days(mask)
+    return [int(date_str[8:10]) for date_str in getattr(pref, kind) or []]
 
 def generate_pdf(month, schedules, preferences):
     """Generate PDF calendar for the month's schedule."""
+    # ReportLab is imported on first render so ICS-only cold starts don't load it
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    
     buffer = BytesIO()
     
     # Create PDF document
@@ -74,14 +218,12 @@ def generate_pdf(month, schedules, preferences):
     unavailable_dates = {}
     preferred_dates = {}
     for pref in preferences:
-        for date_str in pref.unavailable:
-            day = int(date_str.split('-')[2])
+        for day in marked_days(pref, 'unavailable'):
             if day not in unavailable_dates:
                 unavailable_dates[day] = []
             unavailable_dates[day].append(pref.doctor_initials)
         
-        for date_str in pref.preferred:
-            day = int(date_str.split('-')[2])
+        for day in marked_days(pref, 'preferred'):
             if day not in preferred_dates:
                 preferred_dates[day] = []
             preferred_dates[day].append(pref.doctor_initials)
@@ -172,4 +314,155 @@ def generate_pdf(month, schedules, preferences):
     pdf_bytes = buffer.getvalue()
     buffer.close()
     
-    return pdf_bytes
\ No newline at end of file
+    return pdf_bytes
+
+# Fast renderer layout, computed once per process and shared by every page.
+# Points are spelled out (inch = 72pt, landscape letter = 792 x 612) so the
+# layout doesn't need ReportLab at import time.
+inch = 72.0
+PAGE_WIDTH, PAGE_HEIGHT = 11*inch, 8.5*inch
+PAGE_MARGIN = 0.5*inch
+CELL_WIDTH = 1.4*inch
+HEADER_HEIGHT = 0.4*inch
+MAX_ROW_HEIGHT = 1.2*inch
+CELL_PADDING = 6
+GRID_LEFT = (PAGE_WIDTH - 7*CELL_WIDTH) / 2
+GRID_TOP = PAGE_HEIGHT - PAGE_MARGIN - 0.6*inch
+LEGEND_HEIGHT = 0.35*inch
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+@lru_cache(maxsize=4096)
+def _text_width(text, font, size):
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    return stringWidth(text, font, size)
+
+def _fit_text(text, font, size, width):
+    """Trim text with an ellipsis so it fits the cell width."""
+    if _text_width(text, font, size) <= width:
+        return text
+    while text and _text_width(text + '...', font, size) > width:
+        text = text[:-1]
+    return text + '...'
+
+def _preference_days(preferences):
+    """Map day of month to the initials of doctors who marked it unavailable / preferred."""
+    unavailable_dates = {}
+    preferred_dates = {}
+    for pref in preferences:
+        for day in marked_days(pref, 'unavailable'):
+            unavailable_dates.setdefault(day, []).append(pref.doctor_initials)
+        for day in marked_days(pref, 'preferred'):
+            preferred_dates.setdefault(day, []).append(pref.doctor_initials)
+    return unavailable_dates, preferred_dates
+
+def _draw_month_page(c, month, schedules, preferences):
+    """Draw one month's calendar grid directly on the canvas."""
+    from reportlab.lib import colors
+    
+    year, month_num = map(int, month.split('-'))
+    cal = calendar.monthcalendar(year, month_num)
+    schedule_dict = {s.date.day: s.doctor_initials for s in schedules}
+    unavailable_dates, preferred_dates = _preference_days(preferences)
+    
+    # Title
+    c.setFillColor(colors.black)
+    c.setFont('Helvetica-Bold', 18)
+    c.drawCentredString(PAGE_WIDTH / 2, PAGE_HEIGHT - PAGE_MARGIN - 0.35*inch,
+                        f"MICU Night Shift Schedule - {calendar.month_name[month_num]} {year}")
+    
+    # Rows shrink so six-week months still fit above the legend
+    available = GRID_TOP - HEADER_HEIGHT - PAGE_MARGIN - LEGEND_HEIGHT
+    row_height = min(MAX_ROW_HEIGHT, available / len(cal))
+    grid_bottom = GRID_TOP - HEADER_HEIGHT - row_height * len(cal)
+    text_width = CELL_WIDTH - 2*CELL_PADDING
+    
+    # Header row and weekend shading
+    c.setFillColor(colors.grey)
+    c.rect(GRID_LEFT, GRID_TOP - HEADER_HEIGHT, 7*CELL_WIDTH, HEADER_HEIGHT, stroke=0, fill=1)
+    c.setFillColor(colors.lightgrey)
+    c.rect(GRID_LEFT + 5*CELL_WIDTH, grid_bottom, 2*CELL_WIDTH, GRID_TOP - HEADER_HEIGHT - grid_bottom,
+           stroke=0, fill=1)
+    c.setFillColor(colors.whitesmoke)
+    c.setFont('Helvetica-Bold', 12)
+    for col, name in enumerate(WEEKDAY_NAMES):
+        c.drawCentredString(GRID_LEFT + (col + 0.5)*CELL_WIDTH, GRID_TOP - HEADER_HEIGHT + 0.14*inch, name)
+    
+    # Calendar cells
+    for row, week in enumerate(cal):
+        top = GRID_TOP - HEADER_HEIGHT - row*row_height
+        for col, day in enumerate(week):
+            if day == 0:
+                continue
+            center = GRID_LEFT + (col + 0.5)*CELL_WIDTH
+            y = top - CELL_PADDING - 10
+            
+            c.setFillColor(colors.black)
+            c.setFont('Helvetica-Bold', 10)
+            c.drawCentredString(center, y, str(day))
+            
+            # Add assigned doctor
+            y -= 16
+            if day in schedule_dict:
+                c.setFont('Helvetica', 14)
+                c.drawCentredString(center, y, schedule_dict[day])
+            else:
+                c.setFillColor(colors.red)
+                c.setFont('Helvetica', 10)
+                c.drawCentredString(center, y, 'Unassigned')
+            
+            # Add preference indicators
+            c.setFont('Helvetica', 8)
+            for lookup, label, color in ((preferred_dates, 'Pref', colors.green),
+                                         (unavailable_dates, 'Unavail', colors.red)):
+                if day in lookup and y - 11 > top - row_height:
+                    y -= 11
+                    c.setFillColor(color)
+                    c.drawCentredString(center, y, _fit_text(f"{label}: {', '.join(lookup[day])}",
+                                                             'Helvetica', 8, text_width))
+    
+    # Grid lines
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    xs = [GRID_LEFT + col*CELL_WIDTH for col in range(8)]
+    ys = [GRID_TOP, GRID_TOP - HEADER_HEIGHT] + [GRID_TOP - HEADER_HEIGHT - (row + 1)*row_height
+                                                 for row in range(len(cal))]
+    c.grid(xs, ys)
+    
+    # Legend
+    c.setFont('Helvetica', 9)
+    c.setFillColor(colors.black)
+    c.drawString(GRID_LEFT, PAGE_MARGIN + 0.1*inch,
+                 "Legend: Doctor Initials = assigned doctor for that night   "
+                 "Pref: = doctors who preferred this day   Unavail: = doctors unavailable this day")
+    c.setFillColor(colors.red)
+    c.drawRightString(GRID_LEFT + 7*CELL_WIDTH, PAGE_MARGIN + 0.1*inch, "Unassigned = no doctor assigned yet")
+
+def generate_pdf_booklet(months):
+    """
+    Render several months into one PDF, one canvas page per month.
+
+    Args:
+        months: List of (month, schedules, preferences) tuples
+
+    Draws straight onto the canvas instead of building platypus Paragraphs
+    and Tables, so fonts, layout and text metrics are computed once and
+    reused across pages.
+    """
+    from reportlab.pdfgen import canvas as pdf_canvas
+    
+    buffer = BytesIO()
+    c = pdf_canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    
+    for month, schedules, preferences in months:
+        _draw_month_page(c, month, schedules, preferences)
+        c.showPage()
+    
+    c.save()
+    pdf_bytes = buffer.getvalue()
+    buffer.close()
+    
+    return pdf_bytes
+
+def generate_pdf_fast(month, schedules, preferences):
+    """Canvas-based equivalent of generate_pdf for a single month."""
+    return generate_pdf_booklet([(month, schedules, preferences)])
@@ -1,84 +1,92 @@
 import json
 import urllib.parse
-from datetime import datetime
+from _metrics import instrumented
 
+@instrumented('generate')
 def handler(request):
-    """Generate schedule for a specific month"""
+    """Generate schedule for a month, or a multi-month horizon via ?months="""
     try:
-        from _shared import create_app, db, Schedule, Preference
-        from scheduler import generate_schedule
+        from _shared import get_app, db, ensure_schema, dumps, generate_months, MonthBusy
+        from scheduler import SOLVER_MODES
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
             if request.method == 'POST':
-                # Get month parameter from query
+                # Get month (or comma-separated months), solver mode and seed parameters from query
                 month = None
+                months = None
+                mode = None
+                seed = None
                 if hasattr(request, 'args'):
                     month = request.args.get('month')
+                    months = request.args.get('months')
+                    mode = request.args.get('mode')
+                    seed = request.args.get('seed')
                 elif hasattr(request, 'query'):
                     month = request.query.get('month')
+                    months = request.query.get('months')
+                    mode = request.query.get('mode')
+                    seed = request.query.get('seed')
                 elif hasattr(request, 'url'):
                     # Parse URL for query parameters
                     parsed = urllib.parse.urlparse(request.url)
                     query_params = urllib.parse.parse_qs(parsed.query)
                     month = query_params.get('month', [None])[0]
+                    months = query_params.get('months', [None])[0]
+                    mode = query_params.get('mode', [None])[0]
+                    seed = query_params.get('seed', [None])[0]
                 
-                if not month:
+                months = sorted({m.strip() for m in (months or month or '').split(',') if m.strip()})
+                if not months:
                     return {
                         'statusCode': 400,
                         'headers': {'Content-Type': 'application/json'},
                         'body': json.dumps({'error': 'Month parameter is required'})
                     }
                 
-                # Get preferences for the month
-                preferences = Preference.query.filter_by(month=month).all()
-                if not preferences:
+                mode = mode or 'greedy'
+                if mode not in SOLVER_MODES:
                     return {
                         'statusCode': 400,
                         'headers': {'Content-Type': 'application/json'},
-                        'body': json.dumps({'error': 'No preferences found for this month'})
+                        'body': json.dumps({'error': f"Mode must be one of: {', '.join(SOLVER_MODES)}"})
                     }
                 
-                # Get existing schedule
-                existing_schedule = {}
-                existing_assignments = Schedule.query.filter_by(month=month).all()
-                for assignment in existing_assignments:
-                    existing_schedule[assignment.date.strftime('%Y-%m-%d')] = assignment.doctor_id
-                
-                # Convert preferences to the format expected by scheduler
-                preferences_data = [p.to_dict() for p in preferences]
+                if seed is not None:
+                    try:
+                        seed = int(seed)
+                    except ValueError:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Seed must be an integer'})
+                        }
                 
                 try:
-                    # Generate new schedule
-                    new_schedule = generate_schedule(month, preferences_data, existing_schedule)
-                    
-                    # Clear existing schedule for the month
-                    Schedule.query.filter_by(month=month).delete()
-                    
-                    # Save new schedule
-                    for date_str, doctor_id in new_schedule.items():
-                        if doctor_id:  # Only save assigned dates
-                            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-                            schedule_entry = Schedule(
-                                date=date_obj,
-                                month=month,
-                                doctor_id=doctor_id
-                            )
-                            db.session.add(schedule_entry)
-                    
-                    db.session.commit()
-                    
+                    # Solve and save; multi-month horizons carry night boundaries across months
+                    response = generate_months(months, mode, seed)
                     return {
                         'statusCode': 200,
                         'headers': {'Content-Type': 'application/json'},
-                        'body': json.dumps({
-                            'message': 'Schedule generated successfully',
-                            'assignments': len(new_schedule),
-                            'schedule': new_schedule
-                        })
+                        'body': dumps(response)
                     }
                     
+                except MonthBusy as e:
+                    return {
+                        'statusCode': 409,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': str(e)})
+                    }
+                except LookupError as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': str(e)})
+                    }
                 except Exception as e:
                     db.session.rollback()
                     return {
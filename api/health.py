@@ -1,42 +1,41 @@
-from flask import Flask, jsonify
 from datetime import datetime
 import json
+from _metrics import instrumented
 
+@instrumented('health')
 def handler(request):
     """Health check endpoint for Vercel"""
     try:
-        # Import here to avoid issues with serverless cold starts
-        from _shared import create_app, db
+        # Raw DB-API path: a health check doesn't need Flask or SQLAlchemy on a cold start
+        from _raw import fetch_all, connection_stats
         
-        app = create_app()
-        
-        with app.app_context():
-            try:
-                # Test database connection
-                db.session.execute('SELECT 1')
-                response_data = {
-                    'status': 'healthy',
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'database': 'connected',
-                    'platform': 'vercel'
-                }
-                return {
-                    'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json'},
-                    'body': json.dumps(response_data)
-                }
-            except Exception as db_error:
-                response_data = {
-                    'status': 'unhealthy',
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'error': str(db_error),
-                    'database': 'disconnected'
-                }
-                return {
-                    'statusCode': 503,
-                    'headers': {'Content-Type': 'application/json'},
-                    'body': json.dumps(response_data)
-                }
+        try:
+            # Test database connection
+            fetch_all('SELECT 1')
+            response_data = {
+                'status': 'healthy',
+                'timestamp': datetime.utcnow().isoformat(),
+                'database': 'connected',
+                'platform': 'vercel',
+                'pool': connection_stats()
+            }
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps(response_data)
+            }
+        except Exception as db_error:
+            response_data = {
+                'status': 'unhealthy',
+                'timestamp': datetime.utcnow().isoformat(),
+                'error': str(db_error),
+                'database': 'disconnected'
+            }
+            return {
+                'statusCode': 503,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps(response_data)
+            }
     except Exception as e:
         # Fallback error response
         response_data = {
@@ -0,0 +1,150 @@
+import json
+import math
+import urllib.parse
+from _metrics import instrumented
+
+# Longest a status request may block waiting for a job to finish
+MAX_WAIT_SECONDS = 25
+
+@instrumented('jobs')
+def handler(request):
+    """Enqueue background generate/export jobs and report their status"""
+    try:
+        from _shared import get_app, db, dumps, ensure_schema, MONTH_PATTERN
+        from _jobs import enqueue, wait_for_job, JOB_KINDS
+        from scheduler import SOLVER_MODES
+        
+        app = get_app()
+        
+        with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
+            if request.method == 'POST':
+                try:
+                    data = json.loads(request.body) if hasattr(request, 'body') else request.get_json()
+                except:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'Invalid JSON in request body'})
+                    }
+                
+                kind = data.get('kind')
+                if kind not in JOB_KINDS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': f"Kind must be one of: {', '.join(JOB_KINDS)}"})
+                    }
+                
+                if kind == 'generate':
+                    months = data.get('months') or ([data['month']] if data.get('month') else [])
+                    mode = data.get('mode', 'greedy')
+                    seed = data.get('seed')
+                    valid_months = isinstance(months, list) and all(
+                        isinstance(m, str) and MONTH_PATTERN.match(m) for m in months
+                    )
+                    if not months or not valid_months or mode not in SOLVER_MODES or not (seed is None or (isinstance(seed, int) and not isinstance(seed, bool))):
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Months as a list of YYYY-MM strings, a valid mode and an integer seed (if given) are required'})
+                        }
+                    params = {'months': sorted(set(months)), 'mode': mode, 'seed': seed}
+                else:
+                    if not isinstance(data.get('month'), str) or not MONTH_PATTERN.match(data['month']):
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Month is required as YYYY-MM'})
+                        }
+                    renderer = data.get('renderer', 'paragraph')
+                    if renderer not in ('paragraph', 'fast'):
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Renderer must be one of: paragraph, fast'})
+                        }
+                    params = {'month': data['month'], 'renderer': renderer}
+                
+                job = enqueue(kind, params)
+                return {
+                    'statusCode': 202,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': dumps({'id': job.id, 'status': job.status})
+                }
+            
+            elif request.method == 'GET':
+                # Get job ID and optional long-poll wait from query
+                job_id = None
+                wait = None
+                if hasattr(request, 'args'):
+                    job_id = request.args.get('id')
+                    wait = request.args.get('wait')
+                elif hasattr(request, 'query'):
+                    job_id = request.query.get('id')
+                    wait = request.query.get('wait')
+                elif hasattr(request, 'url'):
+                    # Parse URL for query parameters
+                    parsed = urllib.parse.urlparse(request.url)
+                    query_params = urllib.parse.parse_qs(parsed.query)
+                    job_id = query_params.get('id', [None])[0]
+                    wait = query_params.get('wait', [None])[0]
+                
+                if not job_id:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'Job ID is required'})
+                    }
+                
+                try:
+                    job_id = int(job_id)
+                except ValueError:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'Job ID must be an integer'})
+                    }
+                
+                try:
+                    wait = float(wait or 0)
+                except ValueError:
+                    wait = None
+                # nan would never pass the poll deadline
+                if wait is None or not math.isfinite(wait):
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'wait must be a number of seconds'})
+                    }
+                wait = max(0, min(wait, MAX_WAIT_SECONDS))
+                
+                job = wait_for_job(job_id, wait)
+                if not job:
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'Job not found'})
+                    }
+                
+                return {
+                    'statusCode': 200,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': dumps(job.to_dict())
+                }
+            
+            else:
+                return {
+                    'statusCode': 405,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({'error': 'Method not allowed'})
+                }
+                
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': f'Server error: {str(e)}'})
+        }
\ No newline at end of file
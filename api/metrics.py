@@ -0,0 +1,69 @@
+import hmac
+import json
+import os
+import urllib.parse
+from _metrics import instrumented
+
+# Bearer token required for slow-request profiles; unset disables them
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+def is_admin(request):
+    """True when the request carries the METRICS_TOKEN bearer token."""
+    headers = getattr(request, 'headers', None) or {}
+    authorization = headers.get('Authorization') or ''
+    scheme, _, token = authorization.partition(' ')
+    return bool(METRICS_TOKEN) and scheme.lower() == 'bearer' and hmac.compare_digest(token.strip(), METRICS_TOKEN)
+
+@instrumented('metrics')
+def handler(request):
+    """
+    Per-endpoint timings and query counts for this instance.
+    
+    Each serverless function keeps its own counters, so this only reports
+    requests served by the metrics function's process; the per-request JSON
+    log lines written by every handler are the cross-function record.
+    """
+    try:
+        from _shared import dumps, metrics_snapshot
+        
+        if request.method == 'GET':
+            # Slow-request profiles are large, so only include them on request
+            profiles = None
+            if hasattr(request, 'args'):
+                profiles = request.args.get('profiles')
+            elif hasattr(request, 'query'):
+                profiles = request.query.get('profiles')
+            elif hasattr(request, 'url'):
+                # Parse URL for query parameters
+                parsed = urllib.parse.urlparse(request.url)
+                query_params = urllib.parse.parse_qs(parsed.query)
+                profiles = query_params.get('profiles', [None])[0]
+            
+            # Profiles expose code paths and timings, so they are admin-only
+            include_profiles = profiles in ('1', 'true')
+            if include_profiles and not is_admin(request):
+                return {
+                    'statusCode': 403,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({'error': 'Profiles require the metrics admin token'})
+                }
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Cache-Control': 'no-store'},
+                'body': dumps(metrics_snapshot(include_profiles=include_profiles))
+            }
+        
+        else:
+            return {
+                'statusCode': 405,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': 'Method not allowed'})
+            }
+            
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': f'Server error: {str(e)}'})
+        }
\ No newline at end of file
@@ -1,26 +1,42 @@
 import json
 import urllib.parse
+from _metrics import instrumented
 
+# How unavailable/preferred days are returned: date string arrays or day bitmasks
+DATE_ENCODINGS = ('list', 'mask')
+
+@instrumented('preferences')
 def handler(request):
     """Get preferences for a specific month"""
     try:
-        from _shared import create_app, db, Preference
+        from _shared import get_app, db, ensure_schema, month_versions, month_snapshot, month_etag, etag_matches, encode_rows, omit_fields, RESPONSE_FORMATS
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
             if request.method == 'GET':
-                # Get month parameter from query
+                # Get month, response format and date encoding parameters from query
                 month = None
+                response_format = None
+                dates = None
                 if hasattr(request, 'args'):
                     month = request.args.get('month')
+                    response_format = request.args.get('format')
+                    dates = request.args.get('dates')
                 elif hasattr(request, 'query'):
                     month = request.query.get('month')
+                    response_format = request.query.get('format')
+                    dates = request.query.get('dates')
                 elif hasattr(request, 'url'):
                     # Parse URL for query parameters
                     parsed = urllib.parse.urlparse(request.url)
                     query_params = urllib.parse.parse_qs(parsed.query)
                     month = query_params.get('month', [None])[0]
+                    response_format = query_params.get('format', [None])[0]
+                    dates = query_params.get('dates', [None])[0]
                 
                 if not month:
                     return {
@@ -29,11 +45,45 @@ def handler(request):
                         'body': json.dumps({'error': 'Month parameter is required'})
                     }
                 
-                preferences = Preference.query.filter_by(month=month).all()
+                response_format = response_format or 'records'
+                if response_format not in RESPONSE_FORMATS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': f"Format must be one of: {', '.join(RESPONSE_FORMATS)}"})
+                    }
+                
+                dates = dates or 'list'
+                if dates not in DATE_ENCODINGS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': f"Dates must be one of: {', '.join(DATE_ENCODINGS)}"})
+                    }
+                
+                # One version query per request: unchanged months get a 304, hot ones
+                # are served from the snapshot cache while it still matches the database
+                versions = month_versions(month)
+                etag = month_etag(versions, ('preferences', 'doctors'), response_format, dates)
+                cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                if etag_matches(request, etag):
+                    return {
+                        'statusCode': 304,
+                        'headers': cache_headers,
+                        'body': ''
+                    }
+                
+                snapshot = month_snapshot(month, versions)
+                
+                # 'mask' ships only the day bitmasks instead of the date arrays
+                table = snapshot['preferences']
+                if dates == 'mask':
+                    table = omit_fields(table, 'unavailable', 'preferred')
+                
                 return {
                     'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json'},
-                    'body': json.dumps([p.to_dict() for p in preferences])
+                    'headers': {'Content-Type': 'application/json', **cache_headers},
+                    'body': encode_rows(table, response_format)
                 }
             
             else:
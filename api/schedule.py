@@ -1,26 +1,35 @@
 import json
 import urllib.parse
+from _metrics import instrumented
 
+@instrumented('schedule')
 def handler(request):
     """Get schedule for a specific month"""
     try:
-        from _shared import create_app, db, Schedule
+        from _shared import get_app, db, ensure_schema, month_versions, month_snapshot, month_etag, etag_matches, encode_rows, RESPONSE_FORMATS
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
             if request.method == 'GET':
-                # Get month parameter from query
+                # Get month and response format parameters from query
                 month = None
+                response_format = None
                 if hasattr(request, 'args'):
                     month = request.args.get('month')
+                    response_format = request.args.get('format')
                 elif hasattr(request, 'query'):
                     month = request.query.get('month')
+                    response_format = request.query.get('format')
                 elif hasattr(request, 'url'):
                     # Parse URL for query parameters
                     parsed = urllib.parse.urlparse(request.url)
                     query_params = urllib.parse.parse_qs(parsed.query)
                     month = query_params.get('month', [None])[0]
+                    response_format = query_params.get('format', [None])[0]
                 
                 if not month:
                     return {
@@ -29,11 +38,32 @@ def handler(request):
                         'body': json.dumps({'error': 'Month parameter is required'})
                     }
                 
-                schedule = Schedule.query.filter_by(month=month).order_by(Schedule.date).all()
+                response_format = response_format or 'records'
+                if response_format not in RESPONSE_FORMATS:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': f"Format must be one of: {', '.join(RESPONSE_FORMATS)}"})
+                    }
+                
+                # One version query per request: unchanged months get a 304, hot ones
+                # are served from the snapshot cache while it still matches the database
+                versions = month_versions(month)
+                etag = month_etag(versions, ('schedule', 'doctors'), response_format)
+                cache_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                if etag_matches(request, etag):
+                    return {
+                        'statusCode': 304,
+                        'headers': cache_headers,
+                        'body': ''
+                    }
+                
+                snapshot = month_snapshot(month, versions)
+                
                 return {
                     'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json'},
-                    'body': json.dumps([s.to_dict() for s in schedule])
+                    'headers': {'Content-Type': 'application/json', **cache_headers},
+                    'body': encode_rows(snapshot['schedule'], response_format)
                 }
             
             else:
@@ -1,123 +1,610 @@
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import heapq
 import random
+import time
 
-def generate_schedule(month, preferences_data, existing_schedule=None):
+# Scoring terms shared by every solver mode
+UNAVAILABLE_SCORE = -1000
+PREFERRED_BONUS = 50
+UNDER_DESIRED_BONUS = 20
+OVER_DESIRED_PENALTY = 30
+CONSECUTIVE_PENALTY = 10
+
+SOLVER_MODES = ('greedy', 'optimal')
+DEFAULT_TIME_LIMIT = 2.0  # seconds of local search in optimal mode
+SEEDED_MAX_PASSES = 25  # local search passes in optimal mode when seeded (replaces the time limit)
+
+# Per-day doctor bitmasks for a scheduling horizon
+CompiledPreferences = namedtuple(
+    'CompiledPreferences',
+    ['dates', 'doctor_ids', 'desired', 'unavailable', 'preferred']
+)
+
+def month_dates(month):
+    """Return every date of a 'YYYY-MM' month as 'YYYY-MM-DD' strings."""
+    year, month_num = map(int, month.split('-'))
+
+    first_day = datetime(year, month_num, 1)
+    if month_num == 12:
+        last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        last_day = datetime(year, month_num + 1, 1) - timedelta(days=1)
+
+    days_in_month = (last_day - first_day).days + 1
+    return [(first_day + timedelta(days=i)).strftime('%Y-%m-%d')
+            for i in range(days_in_month)]
+
+def encode_days(month, dates):
+    """
+    Pack 'YYYY-MM-DD' strings into a day bitmask for ``month``.
+
+    Bit ``day - 1`` is set for each listed day, so a whole month fits in a
+    31-bit integer. Dates outside the month, including days past its last
+    day such as '2024-04-31', are ignored, so the result always decodes.
+    """
+    prefix = month + '-'
+    days_in_month = len(month_dates(month))
+    mask = 0
+    for date in dates or []:
+        if date.startswith(prefix):
+            day = int(date[8:10])
+            if 1 <= day <= days_in_month:
+                mask |= 1 << (day - 1)
+    return mask
+
+def mask_days(mask):
+    """Return the days of month (1-31) set in a day bitmask, ascending."""
+    days = []
+    while mask:
+        low = mask & -mask
+        days.append(low.bit_length())
+        mask ^= low
+    return days
+
+def decode_days(month, mask):
+    """
+    Unpack a day bitmask back into 'YYYY-MM-DD' strings for ``month``.
+
+    Raises:
+        ValueError: ``mask`` is not an integer or sets bits past the month's last day
+    """
+    limit = 1 << len(month_dates(month))
+    if not isinstance(mask, int) or isinstance(mask, bool) or not 0 <= mask < limit:
+        raise ValueError(f'Day mask for {month} must be an integer from 0 to {limit - 1}')
+    return [f'{month}-{day:02d}' for day in mask_days(mask)]
+
+def marks_day(pref, kind, date):
+    """
+    True when a preference lists ``date`` as ``kind`` ('unavailable' or
+    'preferred'). A bit test when the stored mask is present, otherwise a
+    scan of the date list.
+    """
+    mask = pref.get(f'{kind}_mask')
+    if mask is not None and date[:7] == pref.get('month'):
+        return bool(mask >> (int(date[8:10]) - 1) & 1)
+    return date in (pref.get(kind) or [])
+
+def compile_preferences(all_dates, preferences_data):
+    """
+    Precompile preferences into per-day doctor bitmasks.
+
+    Bit ``i`` of ``unavailable[day]`` / ``preferred[day]`` is set when the
+    doctor at ``doctor_ids[i]`` marked that day of the horizon, so scoring a
+    candidate is a bit test instead of a list scan.
+
+    Args:
+        all_dates: Ordered list of 'YYYY-MM-DD' strings making up the horizon
+        preferences_data: List of preference dictionaries
+
+    Returns:
+        CompiledPreferences
+    """
+    day_index = {date: i for i, date in enumerate(all_dates)}
+    doctor_prefs = {p['doctor_id']: p for p in preferences_data}
+
+    doctor_ids = list(doctor_prefs.keys())
+    desired = [doctor_prefs[d].get('desired_shifts', 0) for d in doctor_ids]
+    unavailable = [0] * len(all_dates)
+    preferred = [0] * len(all_dates)
+
+    for bit, doctor_id in enumerate(doctor_ids):
+        pref = doctor_prefs[doctor_id]
+
+        # Stored day bitmasks map straight onto the month's day indexes;
+        # bits past the month's last day are dropped, as decode_days rejects them
+        start = day_index.get(f"{pref.get('month')}-01")
+        if start is not None and pref.get('unavailable_mask') is not None and pref.get('preferred_mask') is not None:
+            month_mask = (1 << len(month_dates(pref['month']))) - 1
+            for day in mask_days(pref['unavailable_mask'] & month_mask):
+                unavailable[start + day - 1] |= 1 << bit
+            for day in mask_days(pref['preferred_mask'] & month_mask):
+                preferred[start + day - 1] |= 1 << bit
+            continue
+
+        for date in pref.get('unavailable') or []:
+            if date in day_index:
+                unavailable[day_index[date]] |= 1 << bit
+        for date in pref.get('preferred') or []:
+            if date in day_index:
+                preferred[day_index[date]] |= 1 << bit
+
+    return CompiledPreferences(list(all_dates), doctor_ids, desired, unavailable, preferred)
+
+def score_candidates(compiled, day, shifts, neighbours, rng=random):
+    """
+    Score every doctor for one day of the horizon.
+
+    Args:
+        compiled: CompiledPreferences for the horizon
+        day: Index of the day being filled
+        shifts: Current shift count per doctor, aligned with doctor_ids
+        neighbours: Doctor ids assigned on the adjacent days
+        rng: Random source for tie-breaking (a seeded random.Random for
+            reproducible schedules)
+
+    Returns:
+        List of scores aligned with doctor_ids; unavailable doctors score
+        UNAVAILABLE_SCORE
+    """
+    unavailable = compiled.unavailable[day]
+    preferred = compiled.preferred[day]
+    desired = compiled.desired
+
+    scores = []
+    for bit, doctor_id in enumerate(compiled.doctor_ids):
+        mask = 1 << bit
+        if unavailable & mask:
+            scores.append(UNAVAILABLE_SCORE)
+            continue
+
+        score = PREFERRED_BONUS if preferred & mask else 0
+
+        current = shifts[bit]
+        if current < desired[bit]:
+            score += UNDER_DESIRED_BONUS
+        elif current > desired[bit]:
+            score -= OVER_DESIRED_PENALTY
+
+        if doctor_id in neighbours:
+            score -= CONSECUTIVE_PENALTY
+
+        # Add randomness for tie-breaking
+        scores.append(score + rng.uniform(-1, 1))
+
+    return scores
+
+def shift_score(count, desired):
+    """Total desired-shift term for a doctor working ``count`` nights."""
+    return (UNDER_DESIRED_BONUS * min(count, desired)
+            - OVER_DESIRED_PENALTY * max(0, count - desired - 1))
+
+def schedule_score(schedule, preferences_data):
+    """
+    Score a complete schedule with the same terms the solvers optimize.
+
+    Returns:
+        Sum of preferred bonuses and desired-shift terms, minus the
+        consecutive-night penalty for every pair of adjacent nights worked
+        by the same doctor
+    """
+    doctor_prefs = {p['doctor_id']: p for p in preferences_data}
+    counts = defaultdict(int)
+    score = 0
+
+    for date, doctor_id in schedule.items():
+        pref = doctor_prefs.get(doctor_id)
+        if not pref:
+            continue
+        counts[doctor_id] += 1
+        if marks_day(pref, 'preferred', date):
+            score += PREFERRED_BONUS
+
+        next_date = (datetime.strptime(date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        if schedule.get(next_date) == doctor_id:
+            score -= CONSECUTIVE_PENALTY
+
+    for doctor_id, count in counts.items():
+        score += shift_score(count, doctor_prefs[doctor_id].get('desired_shifts', 0))
+
+    return score
+
+def generate_schedule(month, preferences_data, existing_schedule=None, mode='greedy',
+                      time_limit=DEFAULT_TIME_LIMIT, boundary=None, seed=None, fill=None, carryover=None):
     """
     Generate an optimized schedule based on doctor preferences.
-    
+
     Args:
         month: String in format 'YYYY-MM'
         preferences_data: List of preference dictionaries
         existing_schedule: Optional existing schedule to modify
-    
+        mode: 'greedy' fills dates in order; 'optimal' solves the month as a
+            min-cost flow and then removes consecutive nights by local search
+        time_limit: Seconds of local search allowed in unseeded 'optimal' mode
+        boundary: Optional assignments outside the month (e.g. the previous
+            month's last night), used only for the consecutive-night penalty
+        seed: Tie-breaking seed; the same inputs and seed always produce the
+            same schedule. Independent of the global random state, and in
+            'optimal' mode the local search is bounded by SEEDED_MAX_PASSES
+            instead of the wall clock so machine speed can't change the result.
+        fill: Optional set of dates that may be assigned; other unassigned
+            dates are left empty. Defaults to every unassigned date.
+        carryover: Optional {doctor_id: nights worked minus nights desired}
+            from earlier months; each doctor's desired_shifts for this month
+            is lowered (or raised) by it so fairness holds across months.
+
     Returns:
         Dictionary mapping dates to doctor IDs
     """
-    year, month_num = map(int, month.split('-'))
-    
-    # Get all days in the month
-    first_day = datetime(year, month_num, 1)
-    if month_num == 12:
-        last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = datetime(year, month_num + 1, 1) - timedelta(days=1)
-    
-    days_in_month = (last_day - first_day).days + 1
-    all_dates = [(first_day + timedelta(days=i)).strftime('%Y-%m-%d') 
-                 for i in range(days_in_month)]
-    
+    if mode not in SOLVER_MODES:
+        raise ValueError(f"Unknown scheduling mode: {mode}")
+
+    all_dates = month_dates(month)
+    rng = random.Random(seed)
+
     # Initialize schedule
     schedule = existing_schedule.copy() if existing_schedule else {}
-    
+
+    compiled = compile_preferences(all_dates, preferences_data)
+    if carryover:
+        compiled = compiled._replace(desired=[max(0, desired - carryover.get(doctor_id, 0))
+                                              for doctor_id, desired in zip(compiled.doctor_ids, compiled.desired)])
+
     # Track assignments per doctor
     doctor_shifts = defaultdict(int)
-    doctor_prefs = {p['doctor_id']: p for p in preferences_data}
-    
+
     # Count existing assignments
+    known_doctors = set(compiled.doctor_ids)
     for date, doctor_id in schedule.items():
-        if doctor_id in doctor_prefs:
+        if doctor_id in known_doctors:
             doctor_shifts[doctor_id] += 1
-    
-    # Sort dates to ensure consistent ordering
-    unassigned_dates = [d for d in all_dates if d not in schedule]
-    
-    # Score function for doctor assignment
-    def score_assignment(doctor_id, date, doctor_shifts_count):
-        pref = doctor_prefs.get(doctor_id)
-        if not pref:
-            return -1000  # Doctor has no preferences submitted
-        
-        score = 0
-        
-        # Check if unavailable
-        if date in pref.get('unavailable', []):
-            return -1000  # Cannot work this day
-        
-        # Check if preferred
-        if date in pref.get('preferred', []):
-            score += 50  # High preference for preferred days
-        
-        # Check if under desired shift count
-        desired = pref.get('desired_shifts', 0)
-        current = doctor_shifts_count.get(doctor_id, 0)
-        
-        if current < desired:
-            score += 20  # Needs more shifts
-        elif current == desired:
-            score += 0   # Has enough shifts
-        else:
-            score -= 30  # Already has too many shifts
-        
-        # Penalize consecutive nights (optional)
-        date_obj = datetime.strptime(date, '%Y-%m-%d')
-        prev_date = (date_obj - timedelta(days=1)).strftime('%Y-%m-%d')
-        next_date = (date_obj + timedelta(days=1)).strftime('%Y-%m-%d')
-        
-        if schedule.get(prev_date) == doctor_id or schedule.get(next_date) == doctor_id:
-            score -= 10  # Slight penalty for consecutive nights
-        
-        # Add randomness for tie-breaking
-        score += random.uniform(-1, 1)
-        
-        return score
-    
-    # Assign each unassigned date
-    for date in unassigned_dates:
-        best_doctor = None
+
+    shifts = [doctor_shifts[d] for d in compiled.doctor_ids]
+
+    # Assignments by day index, padded with the days either side of the month
+    before = (datetime.strptime(all_dates[0], '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+    after = (datetime.strptime(all_dates[-1], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    boundary = boundary or {}
+    assigned = [schedule.get(before, boundary.get(before))] \
+        + [schedule.get(d) for d in all_dates] \
+        + [schedule.get(after, boundary.get(after))]
+
+    open_days = [day for day, date in enumerate(all_dates)
+                 if date not in schedule and (fill is None or date in fill)]
+
+    if mode == 'optimal':
+        max_passes = SEEDED_MAX_PASSES if seed is not None else None
+        _solve_optimal(compiled, schedule, shifts, assigned, open_days, time_limit, max_passes)
+        return schedule
+
+    # Assign each open date in order
+    for day in open_days:
+        date = all_dates[day]
+
+        neighbours = (assigned[day], assigned[day + 2])
+        scores = score_candidates(compiled, day, shifts, neighbours, rng)
+
+        best_bit = None
         best_score = -999999
-        
-        # Try each doctor
-        for doctor_id in doctor_prefs.keys():
-            score = score_assignment(doctor_id, date, doctor_shifts)
+        for bit, score in enumerate(scores):
             if score > best_score:
                 best_score = score
-                best_doctor = doctor_id
-        
+                best_bit = bit
+
         # Assign the best doctor if found
-        if best_doctor and best_score > -1000:
+        if best_bit is not None and best_score > UNAVAILABLE_SCORE:
+            best_doctor = compiled.doctor_ids[best_bit]
             schedule[date] = best_doctor
-            doctor_shifts[best_doctor] += 1
-    
+            assigned[day + 1] = best_doctor
+            shifts[best_bit] += 1
+
     return schedule
 
+def repair_schedule(month, preferences_data, current_schedule, delta, mode='greedy',
+                    time_limit=DEFAULT_TIME_LIMIT, seed=None):
+    """
+    Incrementally repair a month after one doctor's preferences change.
+
+    Only the dates touched by the change are reopened: nights the doctor is
+    now unavailable for, dates added to or dropped from their preferred list,
+    and all of their nights if desired_shifts changed, plus the adjacent
+    night on either side. Only reopened dates are refilled; every other
+    date, assigned or not, is kept as-is, so new_schedule and diff agree.
+
+    Args:
+        month: String in format 'YYYY-MM'
+        preferences_data: List of preference dictionaries before the change
+        current_schedule: Dictionary mapping dates to doctor IDs
+        delta: The doctor's new preference dictionary
+        mode: Solver mode used to refill the reopened dates
+        time_limit: Seconds of local search allowed in 'optimal' mode
+        seed: Tie-breaking seed passed to generate_schedule
+
+    Returns:
+        (new_schedule, diff) where diff maps each changed date to
+        (previous_doctor_id, new_doctor_id)
+    """
+    doctor_id = delta['doctor_id']
+    previous = next((p for p in preferences_data if p['doctor_id'] == doctor_id), {})
+
+    # Keep the doctor's position so tie-breaking order is unchanged
+    updated = [delta if p['doctor_id'] == doctor_id else p for p in preferences_data]
+    if not previous:
+        updated.append(delta)
+
+    all_dates = month_dates(month)
+    assigned_dates = {d for d, doc in current_schedule.items() if doc == doctor_id}
+    preferred = set(delta.get('preferred') or [])
+
+    affected = assigned_dates & set(delta.get('unavailable') or [])
+    affected |= preferred ^ set(previous.get('preferred') or [])
+    if delta.get('desired_shifts') != previous.get('desired_shifts'):
+        affected |= assigned_dates
+
+    reopen = set()
+    for day, date in enumerate(all_dates):
+        if date in affected:
+            reopen.update(all_dates[max(day - 1, 0):day + 2])
+
+    kept = {d: doc for d, doc in current_schedule.items() if d not in reopen}
+    new_schedule = generate_schedule(month, updated, kept, mode=mode, time_limit=time_limit,
+                                     seed=seed, fill=reopen)
+
+    diff = {d: (current_schedule.get(d), new_schedule.get(d))
+            for d in sorted(reopen)
+            if current_schedule.get(d) != new_schedule.get(d)}
+    return new_schedule, diff
+
+def generate_horizon(months, preferences_by_unit, existing_by_unit=None, mode='greedy',
+                     time_limit=DEFAULT_TIME_LIMIT, max_workers=None, seed=None):
+    """
+    Generate schedules for several months across one or more units.
+
+    Months of a unit are solved in order so the last night of each month is
+    carried into the next as a consecutive-night boundary, and each doctor's
+    surplus or shortfall against desired_shifts so far is carried into the
+    next month's targets; units are independent and are solved in parallel
+    worker processes.
+
+    Args:
+        months: List of 'YYYY-MM' strings
+        preferences_by_unit: {unit: {month: preferences_data}}
+        existing_by_unit: Optional {unit: existing_schedule} spanning the horizon
+        mode: Solver mode passed to generate_schedule
+        time_limit: Per-month local search budget in 'optimal' mode
+        max_workers: Process pool size; defaults to one worker per unit
+        seed: Tie-breaking seed, used for every month so results don't depend
+            on which worker process solves a unit
+
+    Returns:
+        {unit: {'schedule': {date: doctor_id}, 'shift_totals': {doctor_id: count}}}
+    """
+    existing_by_unit = existing_by_unit or {}
+    jobs = [(unit, sorted(months), preferences_by_unit[unit], existing_by_unit.get(unit), mode, time_limit, seed)
+            for unit in preferences_by_unit]
+
+    if len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers or len(jobs)) as pool:
+                return dict(pool.map(_solve_unit, jobs))
+        except (OSError, NotImplementedError):
+            pass  # No multiprocessing support (e.g. serverless sandbox), solve inline
+
+    return dict(_solve_unit(job) for job in jobs)
+
+def _solve_unit(job):
+    """Solve every month of one unit in order, carrying boundaries and totals."""
+    unit, months, preferences_by_month, existing, mode, time_limit, seed = job
+    existing = existing or {}
+
+    schedule = {}
+    shift_totals = defaultdict(int)
+    # Nights worked minus nights desired over the months solved so far
+    carryover = defaultdict(int)
+    for month in months:
+        dates = month_dates(month)
+        month_existing = {d: existing[d] for d in dates if d in existing}
+        preferences_data = preferences_by_month.get(month, [])
+        month_schedule = generate_schedule(
+            month,
+            preferences_data,
+            month_existing,
+            mode=mode,
+            time_limit=time_limit,
+            boundary={**existing, **schedule},
+            seed=seed,
+            carryover=carryover
+        )
+        for doctor_id in month_schedule.values():
+            shift_totals[doctor_id] += 1
+            carryover[doctor_id] += 1
+        for pref in preferences_data:
+            carryover[pref['doctor_id']] -= pref.get('desired_shifts', 0)
+        schedule.update(month_schedule)
+
+    return unit, {'schedule': schedule, 'shift_totals': dict(shift_totals)}
+
+def _solve_optimal(compiled, schedule, shifts, assigned, open_days, time_limit, max_passes=None):
+    """
+    Fill the open days (indexes into the horizon) with a min-cost flow assignment.
+
+    Days are matched to doctors through a flow network whose arc costs are
+    the preferred bonus and the marginal desired-shift term (convex in the
+    shift count), so the flow is an exact optimum of everything except the
+    consecutive-night penalty. A bounded local search then trades shifts to
+    remove consecutive nights, for ``max_passes`` passes when given and
+    otherwise until ``time_limit``. Updates schedule, shifts and assigned in place.
+    """
+    doctor_count = len(compiled.doctor_ids)
+
+    # Node layout: source, one node per open day, one per doctor, sink
+    source = 0
+    sink = 1 + len(open_days) + doctor_count
+    graph = [[] for _ in range(sink + 1)]
+
+    def add_edge(u, v, cost):
+        graph[u].append([v, 1, cost, len(graph[v])])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    # Costs are shifted by a constant per unit of flow so they stay non-negative
+    for node, day in enumerate(open_days, start=1):
+        add_edge(source, node, 0)
+        for bit in range(doctor_count):
+            mask = 1 << bit
+            if compiled.unavailable[day] & mask:
+                continue
+            bonus = PREFERRED_BONUS if compiled.preferred[day] & mask else 0
+            add_edge(node, 1 + len(open_days) + bit, PREFERRED_BONUS - bonus)
+
+    for bit in range(doctor_count):
+        desired = compiled.desired[bit]
+        for count in range(shifts[bit], shifts[bit] + len(open_days)):
+            marginal = shift_score(count + 1, desired) - shift_score(count, desired)
+            add_edge(1 + len(open_days) + bit, sink, OVER_DESIRED_PENALTY - marginal)
+
+    # Successive shortest paths with Johnson potentials
+    potential = [0] * (sink + 1)
+    for _ in open_days:
+        dist = [None] * (sink + 1)
+        parent = [None] * (sink + 1)
+        dist[source] = 0
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for index, (v, cap, cost, _) in enumerate(graph[u]):
+                if not cap:
+                    continue
+                nd = d + cost + potential[u] - potential[v]
+                if dist[v] is None or nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = (u, index)
+                    heapq.heappush(heap, (nd, v))
+
+        if dist[sink] is None:
+            break  # Remaining days have no available doctor
+
+        for node, d in enumerate(dist):
+            if d is not None:
+                potential[node] += d
+
+        node = sink
+        while node != source:
+            u, index = parent[node]
+            edge = graph[u][index]
+            edge[1] -= 1
+            graph[node][edge[3]][1] += 1
+            node = u
+
+    for node, day in enumerate(open_days, start=1):
+        for v, cap, cost, _ in graph[node]:
+            if v > len(open_days) and not cap:
+                bit = v - 1 - len(open_days)
+                assigned[day + 1] = compiled.doctor_ids[bit]
+                shifts[bit] += 1
+
+    deadline = None if max_passes is not None else time.monotonic() + time_limit
+    _improve_consecutive(compiled, open_days, shifts, assigned, deadline, max_passes)
+
+    for day in open_days:
+        if assigned[day + 1] is not None:
+            schedule[compiled.dates[day]] = assigned[day + 1]
+
+def _reassign_delta(compiled, day, bit, new_bit, shifts, assigned):
+    """Change in schedule_score from moving ``day`` from ``bit`` to ``new_bit``."""
+    preferred = compiled.preferred[day]
+    delta = (PREFERRED_BONUS if preferred & (1 << new_bit) else 0) \
+        - (PREFERRED_BONUS if preferred & (1 << bit) else 0)
+
+    desired = compiled.desired
+    delta += shift_score(shifts[bit] - 1, desired[bit]) - shift_score(shifts[bit], desired[bit])
+    delta += shift_score(shifts[new_bit] + 1, desired[new_bit]) - shift_score(shifts[new_bit], desired[new_bit])
+
+    for neighbour in (assigned[day], assigned[day + 2]):
+        if neighbour == compiled.doctor_ids[bit]:
+            delta += CONSECUTIVE_PENALTY
+        if neighbour == compiled.doctor_ids[new_bit]:
+            delta -= CONSECUTIVE_PENALTY
+
+    return delta
+
+def _improve_consecutive(compiled, open_days, shifts, assigned, deadline=None, max_passes=None):
+    """
+    Hill-climb over single reassignments and pairwise swaps of open days
+    until no move improves schedule_score, the deadline (a time.monotonic()
+    value) passes or ``max_passes`` full passes have run. A pass count
+    keeps the result deterministic; a deadline does not.
+    """
+    def out_of_time():
+        return deadline is not None and time.monotonic() >= deadline
+
+    bit_of = {doctor_id: bit for bit, doctor_id in enumerate(compiled.doctor_ids)}
+
+    def move(day, bit, new_bit):
+        delta = _reassign_delta(compiled, day, bit, new_bit, shifts, assigned)
+        assigned[day + 1] = compiled.doctor_ids[new_bit]
+        shifts[bit] -= 1
+        shifts[new_bit] += 1
+        return delta
+
+    improved = True
+    passes = 0
+    while improved and not out_of_time() and (max_passes is None or passes < max_passes):
+        improved = False
+        passes += 1
+        for i, day in enumerate(open_days):
+            if assigned[day + 1] is None:
+                continue
+            bit = bit_of[assigned[day + 1]]
+
+            # Hand the night to another available doctor
+            for new_bit in range(len(compiled.doctor_ids)):
+                if new_bit == bit or compiled.unavailable[day] & (1 << new_bit):
+                    continue
+                if _reassign_delta(compiled, day, bit, new_bit, shifts, assigned) > 0:
+                    move(day, bit, new_bit)
+                    bit = new_bit
+                    improved = True
+
+            # Swap nights with a doctor working another open day
+            for other in open_days[i + 1:]:
+                if assigned[other + 1] is None:
+                    continue
+                other_bit = bit_of[assigned[other + 1]]
+                if other_bit == bit \
+                        or compiled.unavailable[day] & (1 << other_bit) \
+                        or compiled.unavailable[other] & (1 << bit):
+                    continue
+                delta = move(day, bit, other_bit) + move(other, other_bit, bit)
+                if delta > 0:
+                    bit = other_bit
+                    improved = True
+                else:
+                    move(other, bit, other_bit)
+                    move(day, other_bit, bit)
+
+            if out_of_time():
+                break
+
 def validate_schedule(schedule, preferences_data):
     """
     Validate that the schedule respects all hard constraints.
-    
+
     Returns:
         (is_valid, list_of_errors)
     """
     errors = []
     doctor_prefs = {p['doctor_id']: p for p in preferences_data}
-    
+
     for date, doctor_id in schedule.items():
         if doctor_id not in doctor_prefs:
             errors.append(f"Doctor {doctor_id} has no preferences for this month")
             continue
-        
+
         pref = doctor_prefs[doctor_id]
-        if date in pref.get('unavailable', []):
+        if marks_day(pref, 'unavailable', date):
             errors.append(f"Doctor {pref['doctor_name']} is assigned on {date} but marked unavailable")
-    
-    return len(errors) == 0, errors
\ No newline at end of file
+
+    return len(errors) == 0, errors
@@ -1,15 +1,20 @@
 import json
+from datetime import datetime
+from _metrics import instrumented
 
+@instrumented('submit')
 def handler(request):
     """Submit doctor preferences"""
     try:
-        from _shared import create_app, db, Preference, Doctor
+        from _shared import get_app, db, ensure_schema, invalidate_month, lock_months, upsert_preferences, MonthBusy, Preference, Doctor, Schedule
+        from sqlalchemy.orm import joinedload
+        from scheduler import repair_schedule, decode_days
         
-        app = create_app()
+        app = get_app()
         
         with app.app_context():
-            # Ensure tables exist
-            db.create_all()
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
             
             if request.method == 'POST':
                 try:
@@ -30,6 +35,18 @@ def handler(request):
                             'body': json.dumps({'error': f'{field} is required'})
                         }
                 
+                # Day bitmasks are accepted in place of the date arrays
+                for kind in ('unavailable', 'preferred'):
+                    if kind not in data and f'{kind}_mask' in data:
+                        try:
+                            data[kind] = decode_days(data['month'], data[f'{kind}_mask'])
+                        except (AttributeError, TypeError, ValueError) as e:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json'},
+                                'body': json.dumps({'error': f'{kind}_mask: {str(e)}'})
+                            }
+                
                 # Validate doctor exists
                 doctor = Doctor.query.get(data['doctor_id'])
                 if not doctor:
@@ -39,38 +56,92 @@ def handler(request):
                         'body': json.dumps({'error': 'Doctor not found'})
                     }
                 
-                # Check if preferences already exist for this month
-                existing = Preference.query.filter_by(
-                    doctor_id=data['doctor_id'],
-                    month=data['month']
-                ).first()
+                # Optional optimistic check: reject if someone else saved after this client loaded
+                if_unmodified_since = None
+                if data.get('if_unmodified_since'):
+                    try:
+                        if_unmodified_since = datetime.fromisoformat(data['if_unmodified_since'])
+                    except (TypeError, ValueError):
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'if_unmodified_since must be an ISO timestamp'})
+                        }
                 
-                if existing:
-                    # Update existing preferences
-                    existing.unavailable = data.get('unavailable', [])
-                    existing.preferred = data.get('preferred', [])
-                    existing.desired_shifts = data['desired_shifts']
-                    preference = existing
-                else:
-                    # Create new preferences
-                    preference = Preference(
-                        doctor_id=data['doctor_id'],
-                        month=data['month'],
-                        unavailable=data.get('unavailable', []),
-                        preferred=data.get('preferred', []),
-                        desired_shifts=data['desired_shifts']
-                    )
-                    db.session.add(preference)
+                # Repair rewrites the month's schedule, so it needs the month lock
+                repair = bool(data.get('repair'))
+                if repair:
+                    try:
+                        lock_months(data['month'])
+                    except MonthBusy as e:
+                        return {
+                            'statusCode': 409,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': str(e)})
+                        }
+                    # Snapshot the month's preferences before the change for incremental repair
+                    previous_preferences = [p.to_dict() for p in Preference.query.options(joinedload(Preference.doctor)).filter_by(month=data['month']).all()]
                 
                 try:
+                    # Insert or update in one statement; concurrent submits can't both insert
+                    written = upsert_preferences([{
+                        'doctor_id': doctor.id,
+                        'month': data['month'],
+                        'unavailable': data.get('unavailable', []),
+                        'preferred': data.get('preferred', []),
+                        'desired_shifts': data['desired_shifts']
+                    }], if_unmodified_since)
+                    if not written:
+                        db.session.rollback()
+                        return {
+                            'statusCode': 409,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Preferences were changed by another submission, reload and try again'})
+                        }
+                    
+                    # Repair only the affected nights of an already generated month
+                    schedule_changes = None
+                    if repair:
+                        rows = {s.date.strftime('%Y-%m-%d'): s for s in Schedule.query.filter_by(month=data['month']).all()}
+                        if rows:
+                            delta = {
+                                'doctor_id': doctor.id,
+                                'doctor_name': doctor.name,
+                                'unavailable': data.get('unavailable', []),
+                                'preferred': data.get('preferred', []),
+                                'desired_shifts': data['desired_shifts']
+                            }
+                            current_schedule = {date: row.doctor_id for date, row in rows.items()}
+                            _, schedule_changes = repair_schedule(data['month'], previous_preferences,
+                                                                  current_schedule, delta)
+                            
+                            for date_str, (_, doctor_id) in schedule_changes.items():
+                                row = rows.get(date_str)
+                                if doctor_id is None:
+                                    db.session.delete(row)
+                                elif row:
+                                    row.doctor_id = doctor_id
+                                    row.revision += 1
+                                else:
+                                    db.session.add(Schedule(
+                                        date=datetime.strptime(date_str, '%Y-%m-%d').date(),
+                                        month=data['month'],
+                                        doctor_id=doctor_id
+                                    ))
+                    
                     db.session.commit()
+                    invalidate_month(data['month'])
+                    preference = Preference.query.get(written[(doctor.id, data['month'])])
+                    response = {
+                        'message': 'Preferences submitted successfully',
+                        'preference': preference.to_dict()
+                    }
+                    if schedule_changes is not None:
+                        response['schedule_changes'] = schedule_changes
                     return {
                         'statusCode': 200,
                         'headers': {'Content-Type': 'application/json'},
-                        'body': json.dumps({
-                            'message': 'Preferences submitted successfully',
-                            'preference': preference.to_dict()
-                        })
+                        'body': json.dumps(response)
                     }
                 except Exception as e:
                     db.session.rollback()
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from _metrics import instrumented
+
+def parse_rows(request):
+    """
+    Read the batch from a JSON array (or {"preferences": [...]}) or a CSV upload.
+    
+    CSV uploads (Content-Type: text/csv) have a header row with doctor
+    (initials or ID), month, desired_shifts, unavailable and preferred;
+    dates within a cell are separated by ';' or spaces.
+    
+    Returns:
+        List of row dictionaries
+    """
+    headers = getattr(request, 'headers', None) or {}
+    content_type = (headers.get('Content-Type') or '').lower()
+    if hasattr(request, 'body'):
+        raw = request.body
+    else:
+        raw = request.get_data()
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8-sig')
+    
+    if 'csv' in content_type:
+        rows = []
+        for row in csv.DictReader(io.StringIO(raw)):
+            rows.append({k.strip().lower(): (v or '').strip() for k, v in row.items() if k})
+        return rows
+    
+    data = json.loads(raw)
+    if isinstance(data, dict):
+        data = data.get('preferences')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of preferences')
+    return data
+
+@instrumented('submit_batch')
+def handler(request):
+    """Submit preferences for many doctors at once from a JSON array or CSV upload"""
+    try:
+        from _shared import (get_app, db, dumps, ensure_schema, invalidate_month, upsert_preferences,
+                             validate_preference_row, row_doctor_key, Doctor)
+        
+        app = get_app()
+        
+        with app.app_context():
+            # Ensure tables exist (checked once per process)
+            ensure_schema()
+            
+            if request.method == 'POST':
+                try:
+                    rows = parse_rows(request)
+                except (ValueError, csv.Error) as e:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': f'Invalid request body: {str(e)}'})
+                    }
+                
+                if not rows:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json'},
+                        'body': json.dumps({'error': 'No preferences in request body'})
+                    }
+                
+                # Optional month for rows that leave it out (e.g. a one-month spreadsheet)
+                default_month = None
+                if hasattr(request, 'args'):
+                    default_month = request.args.get('month')
+                elif hasattr(request, 'query'):
+                    default_month = request.query.get('month')
+                
+                # Validate every doctor with one query
+                ids = set()
+                initials = set()
+                for row in rows:
+                    key = row_doctor_key(row) if isinstance(row, dict) else None
+                    if isinstance(key, int):
+                        ids.add(key)
+                    elif key:
+                        initials.add(key)
+                doctors = Doctor.query.filter(db.or_(Doctor.id.in_(ids), Doctor.initials.in_(initials))).all()
+                doctors_by_id = {d.id: d for d in doctors}
+                doctors_by_initials = {d.initials: d for d in doctors}
+                
+                results = []
+                valid = {}
+                for index, row in enumerate(rows, start=1):
+                    values, error = validate_preference_row(row, default_month, doctors_by_id, doctors_by_initials)
+                    key = values and (values['doctor_id'], values['month'])
+                    if values and key in valid:
+                        # One statement can't update the same row twice
+                        error = f"Duplicate of row {valid[key][0]} for the same doctor and month"
+                    if error:
+                        results.append({'row': index, 'status': 'error', 'error': error})
+                    else:
+                        valid[key] = (index, values)
+                        results.append({'row': index, 'status': 'saved', 'doctor_id': values['doctor_id'], 'month': values['month']})
+                
+                # Upsert every valid row in one statement
+                written = {}
+                if valid:
+                    try:
+                        written = upsert_preferences([values for _, values in valid.values()])
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        return {
+                            'statusCode': 500,
+                            'headers': {'Content-Type': 'application/json'},
+                            'body': json.dumps({'error': 'Failed to submit preferences'})
+                        }
+                    invalidate_month(*{month for _, month in valid})
+                
+                for result in results:
+                    if result['status'] == 'saved':
+                        result['preference_id'] = written.get((result['doctor_id'], result['month']))
+                
+                saved = sum(1 for r in results if r['status'] == 'saved')
+                return {
+                    'statusCode': 200 if saved else 400,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': dumps({
+                        'message': f'{saved} of {len(rows)} preferences submitted',
+                        'saved': saved,
+                        'errors': len(rows) - saved,
+                        'results': results
+                    })
+                }
+            
+            else:
+                return {
+                    'statusCode': 405,
+                    'headers': {'Content-Type': 'application/json'},
+                    'body': json.dumps({'error': 'Method not allowed'})
+                }
+    
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps({'error': f'Server error: {str(e)}'})
+        }
\ No newline at end of file
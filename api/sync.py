@@ -0,0 +1,176 @@
+import csv
+from datetime import date
+from _metrics import instrumented
+
+SYNC_TABLES = ('doctors', 'preferences', 'schedule')
+
+# Rows per server-side cursor fetch on export and per INSERT statement on import
+CHUNK_SIZE = 1000
+
+# Only the first errors are returned so a bad multi-year file can't blow up the response
+MAX_REPORTED_ERRORS = 100
+
+# Exported columns; imports read the same headers, so an export can be re-imported as-is
+CSV_COLUMNS = {
+    'doctors': ['id', 'name', 'initials', 'active', 'created_at'],
+    'preferences': ['doctor_initials', 'month', 'desired_shifts', 'unavailable', 'preferred', 'submitted_at'],
+    'schedule': ['date', 'month', 'doctor_initials', 'doctor_name', 'modified_at'],
+}
+
+def table_query(table, start, end):
+    """Column-projected export query for a table, limited to months start..end when given"""
+    from _shared import doctor_rows, preference_rows, schedule_rows, Doctor, Preference, Schedule
+    
+    if table == 'doctors':
+        return doctor_rows().order_by(Doctor.name)
+    
+    model = Preference if table == 'preferences' else Schedule
+    criteria = []
+    if start:
+        criteria.append(model.month >= start)
+    if end:
+        criteria.append(model.month <= end)
+    if table == 'preferences':
+        return preference_rows(*criteria).order_by(Preference.month, Preference.id)
+    return schedule_rows(*criteria).order_by(Schedule.date)
+
+def stream_table(app, table, start, end):
+    """Stream a table as CSV from a server-side cursor"""
+    from export_utils import iter_csv
+    
+    # The response body is produced after the handler returns, so it needs its own context
+    with app.app_context():
+        columns = CSV_COLUMNS[table]
+        rows = table_query(table, start, end).yield_per(CHUNK_SIZE)
+        yield from iter_csv(columns, (tuple(getattr(row, c) for c in columns) for row in rows))
+
+def chunked(records, size):
+    """Group an iterable into lists of at most ``size`` items"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def add_error(report, line, error):
+    report['skipped'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line, 'error': error})
+
+def import_doctors(records, report):
+    from _shared import upsert_doctors
+    
+    for chunk in chunked(records, CHUNK_SIZE):
+        rows = {}
+        for line, record in chunk:
+            name = record.get('name')
+            initials = (record.get('initials') or '').upper()
+            if not name or not 2 <= len(initials) <= 4:
+                add_error(report, line, 'name and 2-4 character initials are required')
+                continue
+            active = (record.get('active') or 'true').lower() not in ('false', '0', 'no')
+            rows[initials] = {'name': name, 'initials': initials, 'active': active}
+        report['imported'] += upsert_doctors(list(rows.values()))
+
+def import_preferences(records, report):
+    from _shared import doctor_rows, upsert_preferences, validate_preference_row
+    
+    doctors = doctor_rows().all()
+    doctors_by_id = {d.id: d for d in doctors}
+    doctors_by_initials = {d.initials: d for d in doctors}
+    
+    for chunk in chunked(records, CHUNK_SIZE):
+        rows = {}
+        for line, record in chunk:
+            values, error = validate_preference_row(record, None, doctors_by_id, doctors_by_initials)
+            if error:
+                add_error(report, line, error)
+                continue
+            # Later lines win; one statement can't update the same row twice
+            rows[(values['doctor_id'], values['month'])] = values
+        upsert_preferences(list(rows.values()))
+        report['imported'] += len(rows)
+
+def import_schedule(records, report):
+    from _shared import doctor_rows, upsert_schedule, row_doctor_key, lock_months
+    
+    doctors = doctor_rows().all()
+    doctors_by_id = {d.id: d.id for d in doctors}
+    doctors_by_initials = {d.initials: d.id for d in doctors}
+    
+    for chunk in chunked(records, CHUNK_SIZE):
+        assignments = {}
+        for line, record in chunk:
+            key = row_doctor_key(record)
+            doctor_id = doctors_by_id.get(key) if isinstance(key, int) else doctors_by_initials.get(key)
+            if not doctor_id:
+                add_error(report, line, f'Doctor not found: {key}')
+                continue
+            try:
+                night = date.fromisoformat(record.get('date') or '')
+            except ValueError:
+                add_error(report, line, 'date must be YYYY-MM-DD')
+                continue
+            assignments[night.isoformat()] = doctor_id
+        
+        # Same per-month locks as /api/generate, so an import can't interleave with a solve
+        lock_months(*{night[:7] for night in assignments})
+        upsert_schedule(assignments)
+        report['imported'] += len(assignments)
+
+IMPORTERS = {'doctors': import_doctors, 'preferences': import_preferences, 'schedule': import_schedule}
+
+@instrumented('sync')
+def handler(request):
+    """Stream a table out as CSV (GET) or import a CSV upload into it (POST)"""
+    # Flask and SQLAlchemy load on the first request, not when the function is imported
+    from flask import Response
+    from _shared import get_app, db, ensure_schema, invalidate_month, MonthBusy, MONTH_PATTERN
+    from export_utils import iter_csv_records
+    
+    app = get_app()
+    
+    with app.app_context():
+        # Ensure tables exist (checked once per process)
+        ensure_schema()
+        
+        table = request.args.get('table')
+        if table not in SYNC_TABLES:
+            return {'error': f"Table must be one of: {', '.join(SYNC_TABLES)}"}, 400
+        
+        if request.method == 'GET':
+            start = request.args.get('start')
+            end = request.args.get('end')
+            if any(m and not MONTH_PATTERN.match(m) for m in (start, end)):
+                return {'error': 'Start and end must be YYYY-MM months'}, 400
+            
+            filename = '_'.join(['micu', table] + [m for m in (start, end) if m]) + '.csv'
+            return Response(stream_table(app, table, start, end),
+                            mimetype='text/csv',
+                            headers={'Content-Disposition': f'attachment; filename={filename}'})
+        
+        elif request.method == 'POST':
+            report = {'table': table, 'imported': 0, 'skipped': 0, 'errors': []}
+            try:
+                # Rows are parsed from the request stream and written chunk by chunk in one transaction
+                IMPORTERS[table](iter_csv_records(request.stream), report)
+                db.session.commit()
+            except MonthBusy as e:
+                db.session.rollback()
+                return {'error': str(e)}, 409
+            except (UnicodeDecodeError, csv.Error) as e:
+                db.session.rollback()
+                return {'error': f'Invalid CSV: {str(e)}'}, 400
+            except Exception as e:
+                db.session.rollback()
+                return {'error': f'Failed to import {table}: {str(e)}'}, 500
+            
+            # Frees this process's copies; other processes see the new month_versions on their next read
+            invalidate_month()
+            return report, 200
+        
+        else:
+            return {'error': 'Method not allowed'}, 405
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+Measure cold-start import time for every handler under api/.
+
+Each entry point is imported in a fresh interpreter, the way a cold
+serverless instance loads it. Two numbers are reported:
+
+    module   importing the handler file itself
+    first    module plus every import inside its functions, i.e. what the
+             first request pays for as well
+
+Results are compared against a stored baseline; the script exits non-zero
+when an entry point starts loading a heavy dependency (Flask, SQLAlchemy,
+ReportLab, ...) at module level that it didn't before.
+
+Timings are medians, stored as ratios to a reference import of a fixed
+set of stdlib modules in a fresh interpreter of the same run, so they
+carry across machines. Slowdowns are reported; they only fail the run
+with --strict-timing, since cold-start timer noise is larger than any
+useful tolerance.
+
+    python benchmarks/bench_imports.py                  # compare to baseline
+    python benchmarks/bench_imports.py --strict-timing  # also fail on slowdowns
+    python benchmarks/bench_imports.py --save-baseline  # record a new baseline
+    python benchmarks/bench_imports.py --save-baseline sync.py  # add one entry point
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+API_DIR = os.path.join(ROOT, 'api')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_baseline.json')
+
+HEAVY_MODULES = ('flask', 'flask_sqlalchemy', 'flask_cors', 'sqlalchemy', 'reportlab', 'psycopg2', 'orjson')
+
+# Absolute slack (ms) on top of the relative tolerance, for timer noise
+NOISE_FLOOR_MS = 15.0
+
+# Timings stored relative to reference_ms()
+RATIOS = {'module_ms': 'module_ratio', 'first_ms': 'first_ratio'}
+
+# Baseline key holding the machine the baseline was recorded on
+META_KEY = '_meta'
+
+# Runs in a fresh child interpreter; pure-Python stdlib packages standing in for a dependency tree
+REFERENCE_PROBE = r'''
+import time
+start = time.perf_counter()
+import json, decimal, argparse, logging, email.parser, http.client, xml.dom.minidom, urllib.request
+print(round((time.perf_counter() - start) * 1000, 2))
+'''
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = r'''
+import ast, importlib, importlib.util, json, sys, time
+path, api_dir, heavy = sys.argv[1], sys.argv[2], sys.argv[3].split(',')
+sys.path[:0] = [api_dir]
+
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('entry_point', path)
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+module_ms = (time.perf_counter() - start) * 1000
+module_heavy = sorted(h for h in heavy if h in sys.modules)
+
+with open(path) as f:
+    tree = ast.parse(f.read())
+names = set()
+for node in ast.walk(tree):
+    if isinstance(node, ast.Import):
+        names.update(a.name for a in node.names)
+    elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+        names.add(node.module)
+for name in sorted(names):
+    importlib.import_module(name)
+first_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    'module_ms': round(module_ms, 2),
+    'first_ms': round(first_ms, 2),
+    'module_heavy': module_heavy,
+    'first_heavy': sorted(h for h in heavy if h in sys.modules)
+}))
+'''
+
+def entry_points():
+    """Handler files under api/, skipping underscore helpers and pure libraries."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(API_DIR):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(('_', '.')))
+        for filename in sorted(filenames):
+            if not filename.endswith('.py') or filename.startswith('_'):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path) as f:
+                if 'def handler(' not in f.read():
+                    continue
+            found.append(os.path.relpath(path, API_DIR).replace(os.sep, '/'))
+    return found
+
+def probe(entry):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, os.path.join(API_DIR, entry), API_DIR, ','.join(HEAVY_MODULES)],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def reference_ms(repeat):
+    """Median time of the stdlib reference import, the yardstick for every timing."""
+    runs = [float(subprocess.run([sys.executable, '-c', REFERENCE_PROBE], capture_output=True,
+                                 text=True, check=True, cwd=ROOT).stdout)
+            for _ in range(repeat)]
+    return round(statistics.median(runs), 2)
+
+def measure(entry, repeat):
+    """Median timings; module lists are identical across runs."""
+    runs = [probe(entry) for _ in range(repeat)]
+    result = dict(runs[0])
+    result['module_ms'] = statistics.median(r['module_ms'] for r in runs)
+    result['first_ms'] = statistics.median(r['first_ms'] for r in runs)
+    return result
+
+def machine_info():
+    return {
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation()
+    }
+
+def compare(results, baseline, tolerance, reference):
+    """
+    Return (regressions, slowdowns) against the baseline.
+
+    Regressions are heavy modules newly loaded at module level. Slowdowns
+    are timing ratios more than ``tolerance`` above the baseline's.
+    """
+    regressions = []
+    slowdowns = []
+    for entry, current in results.items():
+        previous = baseline.get(entry)
+        if not previous:
+            continue
+        for metric, ratio in RATIOS.items():
+            if ratio in previous and \
+                    current[ratio] > previous[ratio] * (1 + tolerance) + NOISE_FLOOR_MS / reference:
+                slowdowns.append(f'{entry}: {ratio} {previous[ratio]} -> {current[ratio]}')
+        added = sorted(set(current['module_heavy']) - set(previous['module_heavy']))
+        if added:
+            regressions.append(f"{entry}: now imports {', '.join(added)} at module level")
+    return regressions, slowdowns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entries', nargs='*', help='Entry points to measure, relative to api/ (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.30,
+                        help='Allowed slowdown before reporting (default 30%%)')
+    parser.add_argument('--strict-timing', action='store_true',
+                        help='Fail on slowdowns instead of only reporting them')
+    args = parser.parse_args()
+
+    reference = reference_ms(args.repeat)
+    print(f'reference import: {reference:.1f} ms\n')
+
+    results = {}
+    print(f"{'entry point':<24} {'module ms':>10} {'first ms':>9}  module-level heavy imports")
+    for entry in args.entries or entry_points():
+        r = measure(entry, args.repeat)
+        for metric, ratio in RATIOS.items():
+            r[ratio] = round(r[metric] / reference, 3)
+        results[entry] = r
+        print(f"{entry:<24} {r['module_ms']:>10.1f} {r['first_ms']:>9.1f}  {', '.join(r['module_heavy']) or '-'}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    meta = baseline.pop(META_KEY, {})
+
+    if args.save_baseline:
+        # Merged, so recording one new entry point keeps every other baseline
+        baseline.update(results)
+        baseline[META_KEY] = machine_info()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline saved to {args.baseline}')
+        return
+
+    if meta and meta != machine_info():
+        print(f"\nBaseline was recorded on a different machine ({meta.get('machine')}, "
+              f"Python {meta.get('python')}); timings are compared as ratios")
+
+    regressions, slowdowns = compare(results, baseline, args.tolerance, reference)
+    if slowdowns:
+        print('\nSlower than baseline' + ('' if args.strict_timing else ' (reported only, see --strict-timing)') + ':')
+        for line in slowdowns:
+            print(f'  {line}')
+    if regressions:
+        print('\nRegressions against baseline:')
+        for line in regressions:
+            print(f'  {line}')
+    if regressions or (slowdowns and args.strict_timing):
+        sys.exit(1)
+    elif baseline:
+        print('\nNo regressions against baseline')
+
+if __name__ == '__main__':
+    main()
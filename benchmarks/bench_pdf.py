@@ -0,0 +1,63 @@
+"""
+Compare the platypus (Paragraph) and canvas PDF renderers.
+
+    python benchmarks/bench_pdf.py --doctors 80 --months 12 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from export_utils import generate_pdf, generate_pdf_fast, generate_pdf_booklet
+from scheduler import month_dates
+
+ScheduleRow = namedtuple('ScheduleRow', ['date', 'doctor_initials'])
+PreferenceRow = namedtuple('PreferenceRow', ['doctor_initials', 'unavailable', 'preferred'])
+
+def synthetic_month(month, doctors, rng):
+    """Random schedule and preferences for one month."""
+    dates = month_dates(month)
+    initials = [f'D{i:02d}' for i in range(doctors)]
+    schedules = [ScheduleRow(date.fromisoformat(d), rng.choice(initials)) for d in dates]
+    preferences = [
+        PreferenceRow(i, rng.sample(dates, rng.randint(0, 6)), rng.sample(dates, rng.randint(0, 4)))
+        for i in initials
+    ]
+    return month, schedules, preferences
+
+def timed(render, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, default=80)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    months = [synthetic_month(f'2025-{m:02d}', args.doctors, rng) for m in range(1, args.months + 1)]
+
+    paragraph = timed(lambda: [generate_pdf(*m) for m in months], args.repeat)
+    fast = timed(lambda: [generate_pdf_fast(*m) for m in months], args.repeat)
+    booklet = timed(lambda: generate_pdf_booklet(months), args.repeat)
+
+    print(f"{args.months} month(s), {args.doctors} doctors, best of {args.repeat}")
+    print(f"  paragraph, one PDF per month: {paragraph * 1000:8.1f} ms")
+    print(f"  canvas, one PDF per month:    {fast * 1000:8.1f} ms  ({paragraph / fast:.1f}x)")
+    print(f"  canvas booklet:               {booklet * 1000:8.1f} ms  ({paragraph / booklet:.1f}x)")
+
+if __name__ == '__main__':
+    main()
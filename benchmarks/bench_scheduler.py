@@ -0,0 +1,278 @@
+"""
+Benchmark generate_schedule and validate_schedule on synthetic rosters.
+
+Each scenario solves a run of consecutive months with a fixed seed and
+reports wall time, peak memory and schedule quality. Results are compared
+against a stored baseline: worse quality, an invalid schedule or memory
+growth exits non-zero.
+
+Timings are medians, compared as ratios to a fixed pure-Python reference
+workload timed just before each scenario, so a baseline recorded on one
+machine still means something on another. Timer noise on shared machines
+still exceeds any useful tolerance, so slowdowns are only reported unless
+--strict-timing is given.
+
+    python benchmarks/bench_scheduler.py                    # compare to baseline
+    python benchmarks/bench_scheduler.py --strict-timing    # also fail on slowdowns
+    python benchmarks/bench_scheduler.py --save-baseline    # record a new baseline
+    python benchmarks/bench_scheduler.py --doctors 500 --months 12 --mode optimal
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+
+from scheduler import generate_schedule, validate_schedule, month_dates, SOLVER_MODES
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'scheduler_baseline.json')
+
+# Absolute slack (in ms and KB) added to the relative tolerance so
+# sub-millisecond scenarios don't flag on timer noise
+NOISE_FLOOR = {'solve_ms': 1.0, 'validate_ms': 0.5, 'peak_kb': 16.0}
+
+# Timings stored relative to reference_ms(); peak memory doesn't depend on machine speed
+RATIOS = {'solve_ms': 'solve_ratio', 'validate_ms': 'validate_ratio'}
+
+# Baseline key holding the reference timing and the machine it was recorded on
+META_KEY = '_meta'
+
+# (doctors, months, unavailable density, preferred density)
+SCENARIOS = [
+    (10, 1, 0.10, 0.05),
+    (10, 1, 0.40, 0.15),
+    (50, 3, 0.10, 0.05),
+    (50, 3, 0.40, 0.15),
+    (200, 12, 0.10, 0.05),
+    (500, 12, 0.40, 0.15),
+]
+
+def scenario_name(doctors, months, unavailable, preferred):
+    return f'{doctors}d-{months}m-u{unavailable:.2f}-p{preferred:.2f}'
+
+def reference_ms(repeat):
+    """Median time of a fixed pure-Python workload, the yardstick for every timing."""
+    rng = random.Random(0)
+    values = [rng.random() for _ in range(100_000)]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ranked = sorted(values)
+        index = {v: i for i, v in enumerate(ranked)}
+        sum(index[v] for v in values if v < 0.5)
+        times.append(time.perf_counter() - start)
+    return round(statistics.median(times) * 1000, 2)
+
+def machine_info():
+    return {
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation()
+    }
+
+def synthetic_roster(month, doctors, unavailable, preferred, rng):
+    """
+    Random preferences for one month.
+
+    Each doctor marks roughly ``unavailable`` of the month as unavailable and
+    ``preferred`` of the remaining nights as preferred; desired shifts are
+    spread around an even share of the month.
+    """
+    dates = month_dates(month)
+    even_share = max(1, round(len(dates) / doctors))
+    roster = []
+    for i in range(doctors):
+        blocked = [d for d in dates if rng.random() < unavailable]
+        open_dates = [d for d in dates if d not in blocked]
+        wanted = [d for d in open_dates if rng.random() < preferred]
+        roster.append({
+            'doctor_id': i + 1,
+            'doctor_name': f'Doctor {i + 1}',
+            'month': month,
+            'unavailable': blocked,
+            'preferred': wanted,
+            'desired_shifts': max(0, even_share + rng.randint(-1, 1))
+        })
+    return roster
+
+def horizon(months, start_year=2025):
+    return [f'{start_year + m // 12}-{m % 12 + 1:02d}' for m in range(months)]
+
+def solve(rosters, mode, seed):
+    """Solve consecutive months, carrying each month's last night into the next."""
+    schedules = {}
+    boundary = {}
+    for month, roster in rosters:
+        schedule = generate_schedule(month, roster, mode=mode, boundary=boundary, seed=seed)
+        schedules[month] = schedule
+        boundary = schedule
+    return schedules
+
+def quality(rosters, schedules):
+    """Unfilled nights, preferred-night hit rate and mean desired-shift deviation."""
+    unfilled = 0
+    assigned = 0
+    hits = 0
+    deviation = 0
+    doctor_months = 0
+    for month, roster in rosters:
+        schedule = schedules[month]
+        prefs = {p['doctor_id']: p for p in roster}
+        unfilled += sum(1 for d in month_dates(month) if not schedule.get(d))
+        counts = Counter(doc for doc in schedule.values() if doc)
+        for day, doc in schedule.items():
+            if doc:
+                assigned += 1
+                hits += day in prefs[doc]['preferred']
+        for doc, p in prefs.items():
+            deviation += abs(counts.get(doc, 0) - p['desired_shifts'])
+            doctor_months += 1
+    return {
+        'unfilled_nights': unfilled,
+        'preference_hit_rate': round(hits / assigned, 4) if assigned else 0.0,
+        'desired_deviation': round(deviation / doctor_months, 4) if doctor_months else 0.0
+    }
+
+def run_scenario(doctors, months, unavailable, preferred, mode, seed, repeat):
+    rng = random.Random(seed)
+    rosters = [(m, synthetic_roster(m, doctors, unavailable, preferred, rng)) for m in horizon(months)]
+
+    # Timings are medians of N runs without tracemalloc, which slows allocation-heavy code
+    solve_times = []
+    validate_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        schedules = solve(rosters, mode, seed)
+        solve_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        valid = all(validate_schedule(schedules[m], r)[0] for m, r in rosters)
+        validate_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    solve(rosters, mode, seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        'solve_ms': round(statistics.median(solve_times) * 1000, 2),
+        'validate_ms': round(statistics.median(validate_times) * 1000, 2),
+        'peak_kb': round(peak / 1024, 1),
+        'valid': valid
+    }
+    result.update(quality(rosters, schedules))
+    return result
+
+def compare(results, baseline, tolerance, timing_tolerance):
+    """
+    Return (regressions, slowdowns) against the baseline.
+
+    Regressions are worse quality, validity or memory. Slowdowns are timing
+    ratios more than ``timing_tolerance`` above the baseline's; entries
+    recorded before ratios were stored have no timings compared.
+    """
+    regressions = []
+    slowdowns = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric, ratio in RATIOS.items():
+            floor = NOISE_FLOOR[metric] / current['reference_ms']
+            if ratio in previous and current[ratio] > previous[ratio] * (1 + timing_tolerance) + floor:
+                slowdowns.append(f'{name}: {ratio} {previous[ratio]} -> {current[ratio]}')
+        if current['peak_kb'] > previous['peak_kb'] * (1 + tolerance) + NOISE_FLOOR['peak_kb']:
+            regressions.append(f"{name}: peak_kb {previous['peak_kb']} -> {current['peak_kb']}")
+        if current['unfilled_nights'] > previous['unfilled_nights']:
+            regressions.append(f"{name}: unfilled_nights {previous['unfilled_nights']} -> {current['unfilled_nights']}")
+        if current['preference_hit_rate'] < previous['preference_hit_rate']:
+            regressions.append(f"{name}: preference_hit_rate {previous['preference_hit_rate']} -> {current['preference_hit_rate']}")
+        if current['desired_deviation'] > previous['desired_deviation']:
+            regressions.append(f"{name}: desired_deviation {previous['desired_deviation']} -> {current['desired_deviation']}")
+        if previous['valid'] and not current['valid']:
+            regressions.append(f'{name}: schedule no longer valid')
+    return regressions, slowdowns
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--doctors', type=int, help='Run a single scenario with this many doctors')
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--unavailable', type=float, default=0.10)
+    parser.add_argument('--preferred', type=float, default=0.05)
+    parser.add_argument('--mode', choices=SOLVER_MODES, default='greedy')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed memory growth before failing (default 25%%)')
+    parser.add_argument('--timing-tolerance', type=float, default=0.5,
+                        help='Allowed slowdown before reporting (default 50%%)')
+    parser.add_argument('--strict-timing', action='store_true',
+                        help='Fail on slowdowns instead of only reporting them')
+    args = parser.parse_args()
+
+    if args.doctors:
+        scenarios = [(args.doctors, args.months, args.unavailable, args.preferred)]
+    else:
+        scenarios = SCENARIOS
+
+    results = {}
+    print(f"{'scenario':<30} {'ref ms':>7} {'solve ms':>10} {'valid ms':>9} {'peak KB':>9} {'unfilled':>9} {'hit rate':>9} {'dev':>7}")
+    for scenario in scenarios:
+        name = f'{args.mode}/{scenario_name(*scenario)}'
+        # Timed next to the scenario so both see the same machine load
+        reference = reference_ms(args.repeat)
+        r = run_scenario(*scenario, args.mode, args.seed, args.repeat)
+        r['reference_ms'] = reference
+        for metric, ratio in RATIOS.items():
+            r[ratio] = round(r[metric] / reference, 4)
+        results[name] = r
+        print(f"{name:<30} {reference:>7.1f} {r['solve_ms']:>10.1f} {r['validate_ms']:>9.2f} {r['peak_kb']:>9.1f} "
+              f"{r['unfilled_nights']:>9} {r['preference_hit_rate']:>9.3f} {r['desired_deviation']:>7.2f}"
+              f"{'' if r['valid'] else '  INVALID'}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    meta = baseline.pop(META_KEY, {})
+
+    if args.save_baseline:
+        baseline.update(results)
+        baseline[META_KEY] = machine_info()
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline saved to {args.baseline}')
+        return
+
+    if meta and {k: meta.get(k) for k in machine_info()} != machine_info():
+        print(f"\nBaseline was recorded on a different machine ({meta.get('machine')}, "
+              f"Python {meta.get('python')}); timings are compared as ratios")
+
+    regressions, slowdowns = compare(results, baseline, args.tolerance, args.timing_tolerance)
+    if slowdowns:
+        print('\nSlower than baseline' + ('' if args.strict_timing else ' (reported only, see --strict-timing)') + ':')
+        for line in slowdowns:
+            print(f'  {line}')
+    if regressions:
+        print('\nRegressions against baseline:')
+        for line in regressions:
+            print(f'  {line}')
+    if regressions or (slowdowns and args.strict_timing):
+        sys.exit(1)
+    elif baseline:
+        print('\nNo regressions against baseline')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+-- 🧮 MICU Scheduler - Migration: compact preference day bitmasks
+-- Adds unavailable_mask / preferred_mask to preferences, keeps them in sync
+-- with the date arrays through a trigger, and backfills existing rows.
+-- Safe to run more than once.
+
+-- =============================================================================
+-- COLUMNS
+-- =============================================================================
+ALTER TABLE preferences ADD COLUMN IF NOT EXISTS unavailable_mask INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE preferences ADD COLUMN IF NOT EXISTS preferred_mask INTEGER NOT NULL DEFAULT 0;
+
+-- =============================================================================
+-- SYNC TRIGGER
+-- =============================================================================
+CREATE OR REPLACE FUNCTION day_mask(month TEXT, date_array TEXT[])
+RETURNS INTEGER AS $$
+    SELECT COALESCE(bit_or(1 << (substr(date_text, 9, 2)::INTEGER - 1)), 0)
+    FROM unnest(date_array) AS date_text
+    WHERE left(date_text, 7) = month;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION sync_preference_masks()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.unavailable_mask = day_mask(NEW.month, NEW.unavailable);
+    NEW.preferred_mask = day_mask(NEW.month, NEW.preferred);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS preferences_sync_masks ON preferences;
+CREATE TRIGGER preferences_sync_masks
+    BEFORE INSERT OR UPDATE ON preferences
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_preference_masks();
+
+-- =============================================================================
+-- BACKFILL
+-- =============================================================================
+UPDATE preferences SET
+    unavailable_mask = day_mask(month, unavailable),
+    preferred_mask = day_mask(month, preferred);
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE '✅ Preference bitmasks added and backfilled';
+END $$;
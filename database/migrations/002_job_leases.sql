@@ -0,0 +1,24 @@
+-- 🧮 MICU Scheduler - Migration: background job leases
+-- Adds a renewable worker lease and an attempt counter to jobs, so jobs
+-- left 'running' by a frozen or killed worker can be claimed again.
+-- Safe to run more than once.
+
+-- =============================================================================
+-- COLUMNS
+-- =============================================================================
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+
+-- Jobs already running have no lease yet; start one so they expire normally
+UPDATE jobs SET claimed_at = COALESCE(started_at, NOW()) WHERE status = 'running' AND claimed_at IS NULL;
+
+-- =============================================================================
+-- INDEXES
+-- =============================================================================
+CREATE INDEX IF NOT EXISTS idx_jobs_running ON jobs(claimed_at) WHERE status = 'running';
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE '✅ Job leases added';
+END $$;
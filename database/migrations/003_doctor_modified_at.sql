@@ -0,0 +1,32 @@
+-- 🧮 MICU Scheduler - Migration: doctor change timestamps
+-- Adds modified_at to doctors, bumped on every update, so cached month
+-- snapshots notice renames and (de)activations made by any process.
+-- Safe to run more than once.
+
+-- =============================================================================
+-- COLUMNS
+-- =============================================================================
+ALTER TABLE doctors ADD COLUMN IF NOT EXISTS modified_at TIMESTAMPTZ DEFAULT NOW();
+
+-- =============================================================================
+-- TRIGGERS
+-- =============================================================================
+CREATE OR REPLACE FUNCTION update_modified_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.modified_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS doctors_update_modified_at ON doctors;
+CREATE TRIGGER doctors_update_modified_at
+    BEFORE UPDATE ON doctors
+    FOR EACH ROW
+    EXECUTE FUNCTION update_modified_at();
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE '✅ Doctor modified_at added';
+END $$;
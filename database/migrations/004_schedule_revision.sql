@@ -0,0 +1,15 @@
+-- 🧮 MICU Scheduler - Migration: schedule revisions
+-- Adds a per-night revision counter, bumped each time the night is
+-- reassigned, which calendar exports publish as the event SEQUENCE.
+-- Safe to run more than once.
+
+-- =============================================================================
+-- COLUMNS
+-- =============================================================================
+ALTER TABLE schedule ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0;
+
+-- Success message
+DO $$
+BEGIN
+    RAISE NOTICE '✅ Schedule revisions added';
+END $$;
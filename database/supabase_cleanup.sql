@@ -8,12 +8,17 @@
 
 -- Remove all triggers first
 DROP TRIGGER IF EXISTS schedule_update_modified_at ON schedule;
+DROP TRIGGER IF EXISTS doctors_update_modified_at ON doctors;
+DROP TRIGGER IF EXISTS preferences_sync_masks ON preferences;
 
 -- Remove functions
 DROP FUNCTION IF EXISTS update_modified_at();
 DROP FUNCTION IF EXISTS validate_date_format(TEXT[]);
+DROP FUNCTION IF EXISTS sync_preference_masks();
+DROP FUNCTION IF EXISTS day_mask(TEXT, TEXT[]);
 
 -- Remove all tables (CASCADE will handle foreign keys)
+DROP TABLE IF EXISTS jobs CASCADE;
 DROP TABLE IF EXISTS schedule CASCADE;
 DROP TABLE IF EXISTS preferences CASCADE;
 DROP TABLE IF EXISTS doctors CASCADE;
@@ -26,6 +31,8 @@ DROP INDEX IF EXISTS idx_preferences_doctor_month;
 DROP INDEX IF EXISTS idx_schedule_month;
 DROP INDEX IF EXISTS idx_schedule_date;
 DROP INDEX IF EXISTS idx_schedule_doctor_month;
+DROP INDEX IF EXISTS idx_jobs_queued;
+DROP INDEX IF EXISTS idx_jobs_running;
 
 -- Success message
 DO $$
@@ -6,6 +6,7 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Clean setup: Drop existing tables if they exist
+DROP TABLE IF EXISTS jobs CASCADE;
 DROP TABLE IF EXISTS schedule CASCADE;
 DROP TABLE IF EXISTS preferences CASCADE; 
 DROP TABLE IF EXISTS doctors CASCADE;
@@ -19,7 +20,8 @@ CREATE TABLE doctors (
     name TEXT NOT NULL CHECK (length(name) > 0),
     initials TEXT UNIQUE NOT NULL CHECK (length(initials) BETWEEN 2 AND 4),
     active BOOLEAN DEFAULT TRUE,
-    created_at TIMESTAMPTZ DEFAULT NOW()
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    modified_at TIMESTAMPTZ DEFAULT NOW()
 );
 
 -- =============================================================================
@@ -32,6 +34,8 @@ CREATE TABLE preferences (
     month TEXT NOT NULL CHECK (month ~ '^\d{4}-\d{2}$'), -- Format: YYYY-MM
     unavailable TEXT[] DEFAULT '{}', -- Array of dates in YYYY-MM-DD format
     preferred TEXT[] DEFAULT '{}',   -- Array of dates in YYYY-MM-DD format
+    unavailable_mask INTEGER NOT NULL DEFAULT 0, -- Bit (day - 1) set per unavailable day, kept in sync by trigger
+    preferred_mask INTEGER NOT NULL DEFAULT 0,   -- Bit (day - 1) set per preferred day, kept in sync by trigger
     desired_shifts INTEGER NOT NULL DEFAULT 7 CHECK (desired_shifts >= 0 AND desired_shifts <= 31),
     submitted_at TIMESTAMPTZ DEFAULT NOW(),
     
@@ -50,11 +54,30 @@ CREATE TABLE schedule (
     month TEXT NOT NULL CHECK (month ~ '^\d{4}-\d{2}$'), -- Format: YYYY-MM
     created_at TIMESTAMPTZ DEFAULT NOW(),
     modified_at TIMESTAMPTZ DEFAULT NOW(),
+    revision INTEGER NOT NULL DEFAULT 0,  -- bumped on each reassignment; the ICS SEQUENCE
     
     -- Each date can only have one doctor assigned
     UNIQUE(date)
 );
 
+-- =============================================================================
+-- JOBS TABLE
+-- Background generate/export work queued by /api/jobs
+-- =============================================================================
+CREATE TABLE jobs (
+    id SERIAL PRIMARY KEY,
+    kind TEXT NOT NULL CHECK (kind IN ('generate', 'pdf')),
+    params JSON NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    result JSON,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    claimed_at TIMESTAMPTZ,          -- worker lease, renewed while running
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+
 -- =============================================================================
 -- PERFORMANCE INDEXES
 -- Optimize common query patterns
@@ -69,6 +92,9 @@ CREATE INDEX idx_schedule_month ON schedule(month);
 CREATE INDEX idx_schedule_date ON schedule(date);
 CREATE INDEX idx_schedule_doctor_month ON schedule(doctor_id, month);
 
+CREATE INDEX idx_jobs_queued ON jobs(created_at) WHERE status = 'queued';
+CREATE INDEX idx_jobs_running ON jobs(claimed_at) WHERE status = 'running';
+
 -- =============================================================================
 -- TRIGGERS FOR AUTOMATIC TIMESTAMPS
 -- =============================================================================
@@ -85,6 +111,37 @@ CREATE TRIGGER schedule_update_modified_at
     FOR EACH ROW
     EXECUTE FUNCTION update_modified_at();
 
+CREATE TRIGGER doctors_update_modified_at
+    BEFORE UPDATE ON doctors
+    FOR EACH ROW
+    EXECUTE FUNCTION update_modified_at();
+
+-- =============================================================================
+-- PREFERENCE DAY BITMASKS
+-- Compact per-month encoding of the unavailable/preferred arrays: bit (day - 1)
+-- is set for each listed day of the preference's month
+-- =============================================================================
+CREATE OR REPLACE FUNCTION day_mask(month TEXT, date_array TEXT[])
+RETURNS INTEGER AS $$
+    SELECT COALESCE(bit_or(1 << (substr(date_text, 9, 2)::INTEGER - 1)), 0)
+    FROM unnest(date_array) AS date_text
+    WHERE left(date_text, 7) = month;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION sync_preference_masks()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.unavailable_mask = day_mask(NEW.month, NEW.unavailable);
+    NEW.preferred_mask = day_mask(NEW.month, NEW.preferred);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER preferences_sync_masks
+    BEFORE INSERT OR UPDATE ON preferences
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_preference_masks();
+
 -- =============================================================================
 -- DATA VALIDATION FUNCTIONS
 -- =============================================================================
@@ -0,0 +1,54 @@
+"""
+Test setup: the API modules run against a throwaway SQLite database.
+
+Postgres-only column types are mapped onto SQLite so the models can be
+created; the tests here count statements, not compare stored values.
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'api'))
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from sqlalchemy import ARRAY, event
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(ARRAY, 'sqlite')
+def _array_as_json(type_, compiler, **kw):
+    return 'JSON'
+
+sqlite3.register_adapter(list, json.dumps)
+
+@pytest.fixture
+def app():
+    from _shared import get_app, db, month_cache
+    app = get_app()
+    with app.app_context():
+        db.create_all()
+        month_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager yielding a list that collects every statement executed inside it."""
+    from _shared import db
+
+    @contextmanager
+    def counter():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return counter
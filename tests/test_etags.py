@@ -0,0 +1,40 @@
+"""Month reads revalidate against everything their payload embeds."""
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import _shared
+import preferences
+import schedule
+from _shared import db, Doctor, Preference, Schedule
+
+MONTH = '2025-01'
+
+@pytest.fixture
+def month(app, monkeypatch):
+    # create_all already built the tables; skip the Postgres bootstrap
+    monkeypatch.setattr(_shared, '_schema_verified', True)
+    db.session.add(Doctor(name='Doctor A', initials='DA'))
+    db.session.flush()
+    db.session.add(Preference(doctor_id=1, month=MONTH, unavailable=[], preferred=[], desired_shifts=3))
+    db.session.add(Schedule(date=date(2025, 1, 1), month=MONTH, doctor_id=1))
+    db.session.commit()
+
+def get(module, etag=None):
+    request = SimpleNamespace(method='GET', args={'month': MONTH}, headers={'If-None-Match': etag} if etag else {})
+    return module.handler(request)
+
+@pytest.mark.parametrize('module', [schedule, preferences])
+def test_doctor_rename_changes_the_etag(month, module):
+    first = get(module)
+    etag = first['headers']['ETag']
+    assert get(module, etag)['statusCode'] == 304
+
+    # What a rename looks like on Postgres, where the trigger bumps modified_at
+    db.session.execute(db.update(Doctor).values(initials='DB', modified_at=date(2100, 1, 1)))
+    db.session.commit()
+
+    renamed = get(module, etag)
+    assert renamed['statusCode'] == 200
+    assert 'DB' in renamed['body']
@@ -0,0 +1,36 @@
+"""Calendar output clients rely on to update events in place."""
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from export_utils import iter_ics, doctor_summary, unit_summary
+
+def night(day, revision=0, modified_at=None):
+    return SimpleNamespace(date=date(2025, 1, day), doctor_initials='AB', revision=revision, modified_at=modified_at)
+
+def events(lines):
+    event = None
+    for line in ''.join(lines).split('\r\n'):
+        if line == 'BEGIN:VEVENT':
+            event = {}
+        elif line == 'END:VEVENT':
+            yield event
+        elif event is not None:
+            key, _, value = line.partition(':')
+            event[key] = value
+
+def test_every_event_has_a_dtstamp():
+    [unstamped, stamped] = events(iter_ics('Unit', [night(1), night(2, modified_at=datetime(2025, 1, 1, 12))], unit_summary))
+    assert unstamped['DTSTAMP'].endswith('Z')
+    assert 'LAST-MODIFIED' not in unstamped
+    assert stamped['DTSTAMP'] == stamped['LAST-MODIFIED'] == '20250101T120000Z'
+
+def test_sequence_is_the_row_revision():
+    [first, reassigned] = events(iter_ics('Unit', [night(1), night(2, revision=3)], unit_summary))
+    assert first['SEQUENCE'] == '0'
+    assert reassigned['SEQUENCE'] == '3'
+
+def test_uids_are_scoped_to_the_calendar():
+    [unit] = events(iter_ics('Unit', [night(1)], unit_summary))
+    [doctor] = events(iter_ics('AB', [night(1)], doctor_summary, 'AB'))
+    [other] = events(iter_ics('UNIT', [night(1)], doctor_summary, 'UNIT'))
+    assert len({unit['UID'], doctor['UID'], other['UID']}) == 3
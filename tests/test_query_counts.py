@@ -0,0 +1,63 @@
+"""Reads must cost a fixed number of statements, however many rows a month has."""
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.orm import joinedload
+
+from _shared import db, month_snapshot, Doctor, Preference, Schedule
+
+MONTH = '2025-01'
+
+def seed(doctors, nights):
+    for i in range(doctors):
+        db.session.add(Doctor(name=f'Doctor {i}', initials=f'D{i:02d}'))
+    db.session.flush()
+    for i in range(doctors):
+        db.session.add(Preference(doctor_id=i + 1, month=MONTH, unavailable=[], preferred=[], desired_shifts=3))
+    for day in range(1, nights + 1):
+        db.session.add(Schedule(date=date(2025, 1, day), month=MONTH, doctor_id=day % doctors + 1))
+    db.session.commit()
+    db.session.expunge_all()
+
+@pytest.mark.parametrize('doctors,nights', [(2, 3), (12, 31)])
+def test_eager_loaded_preferences_serialize_in_one_query(app, count_queries, doctors, nights):
+    # The generate and incremental repair path
+    seed(doctors, nights)
+    with count_queries() as statements:
+        rows = [p.to_dict() for p in Preference.query.options(joinedload(Preference.doctor)).filter_by(month=MONTH)]
+    assert len(rows) == doctors
+    assert all(r['doctor_initials'] for r in rows)
+    assert len(statements) == 1
+
+@pytest.mark.parametrize('doctors,nights', [(2, 3), (12, 31)])
+def test_eager_loaded_schedule_serializes_in_one_query(app, count_queries, doctors, nights):
+    seed(doctors, nights)
+    with count_queries() as statements:
+        rows = [s.to_dict() for s in Schedule.query.options(joinedload(Schedule.doctor)).filter_by(month=MONTH)]
+    assert len(rows) == nights
+    assert all(r['doctor_initials'] for r in rows)
+    assert len(statements) == 1
+
+@pytest.mark.parametrize('doctors,nights', [(2, 3), (12, 31)])
+def test_month_snapshot_query_count(app, count_queries, doctors, nights):
+    # /api/schedule, /api/preferences and the exports: one version query plus one per table
+    seed(doctors, nights)
+    with count_queries() as statements:
+        snapshot = month_snapshot(MONTH)
+    assert len(snapshot['schedule'][1]) == nights
+    assert len(statements) == 4
+
+    # A warm snapshot that still matches the database only costs the version query
+    with count_queries() as statements:
+        month_snapshot(MONTH)
+    assert len(statements) == 1
+
+def test_month_snapshot_sees_doctor_renames_from_other_processes(app):
+    # Another process renames a doctor without touching this process's cache
+    seed(2, 3)
+    names = lambda: {d.id: d.name for d in month_snapshot(MONTH)['doctors'][1]}
+    assert names()[1] == 'Doctor 0'
+    # On Postgres the doctors_update_modified_at trigger bumps modified_at; sqlite needs it spelled out
+    db.session.execute(db.update(Doctor).where(Doctor.id == 1).values(name='Renamed', modified_at=datetime(2100, 1, 1)))
+    db.session.commit()
+    assert names()[1] == 'Renamed'
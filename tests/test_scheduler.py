@@ -0,0 +1,59 @@
+"""Solver behaviour that doesn't need a database."""
+from scheduler import generate_schedule, generate_horizon, repair_schedule, encode_days, month_dates
+
+MONTH = '2025-02'
+
+def preferences(doctors, desired=7):
+    return [{'doctor_id': d, 'month': MONTH, 'unavailable': [], 'preferred': [], 'desired_shifts': desired}
+            for d in range(1, doctors + 1)]
+
+def test_repair_only_refills_reopened_dates():
+    prefs = preferences(4)
+    current = generate_schedule(MONTH, prefs, seed=1)
+
+    # Nights that were already unfilled must stay unfilled, not appear in the repair
+    unfilled = {'2025-02-20', '2025-02-21'}
+    current = {d: doc for d, doc in current.items() if d not in unfilled}
+
+    doctor = current['2025-02-05']
+    delta = dict(prefs[doctor - 1], unavailable=['2025-02-05'])
+    new_schedule, diff = repair_schedule(MONTH, prefs, current, delta, seed=1)
+
+    assert not unfilled & set(new_schedule)
+    changed = {d for d in month_dates(MONTH) if current.get(d) != new_schedule.get(d)}
+    assert changed == set(diff)
+    assert new_schedule['2025-02-05'] != doctor
+
+def test_seeded_optimal_mode_ignores_the_wall_clock():
+    prefs = preferences(6, desired=5)
+    for i, p in enumerate(prefs):
+        p['unavailable'] = [f'{MONTH}-{d:02d}' for d in range(1 + i, 29, 6)]
+
+    # Without a deadline in play, a starved time budget must give the same schedule
+    rushed = generate_schedule(MONTH, prefs, mode='optimal', seed=7, time_limit=0)
+    relaxed = generate_schedule(MONTH, prefs, mode='optimal', seed=7, time_limit=10)
+    assert rushed == relaxed
+
+def test_horizon_carries_shift_balance_into_later_months():
+    # February forces doctor 1 far over their desired nights
+    february = preferences(2)
+    february[1]['unavailable'] = [d for d in month_dates(MONTH) if d[8:10] > '07']
+    march = [dict(p, month='2025-03', unavailable=[], desired_shifts=15) for p in preferences(2)]
+
+    alone = generate_schedule('2025-03', march, seed=1)
+    horizon = generate_horizon([MONTH, '2025-03'], {'micu': {MONTH: february, '2025-03': march}}, seed=1)
+    carried = {d: doc for d, doc in horizon['micu']['schedule'].items() if d.startswith('2025-03')}
+
+    nights = lambda schedule: sum(doc == 1 for doc in schedule.values())
+    assert nights(carried) < nights(alone)
+
+def test_days_past_the_month_end_are_ignored():
+    assert encode_days('2024-04', ['2024-04-30', '2024-04-31']) == 1 << 29
+
+    # A stored mask with a bit for April 31 must not mark May 1 or overflow
+    prefs = [{'doctor_id': 1, 'month': '2024-04', 'unavailable': [], 'preferred': [],
+              'unavailable_mask': 1 << 30, 'preferred_mask': 0, 'desired_shifts': 30}]
+    assert len(generate_schedule('2024-04', prefs, seed=1)) == 30
+    may = [dict(prefs[0], month='2024-05', unavailable_mask=0)]
+    horizon = generate_horizon(['2024-04', '2024-05'], {'micu': {'2024-04': prefs, '2024-05': may}}, seed=1)
+    assert horizon['micu']['schedule']['2024-05-01'] == 1
@@ -0,0 +1,31 @@
+"""Bulk preference rows are checked one by one, so a bad row never fails the batch."""
+from types import SimpleNamespace
+
+import pytest
+
+from _shared import validate_preference_row
+
+DOCTOR = SimpleNamespace(id=1, initials='AB')
+
+def validate(**fields):
+    row = {'doctor_id': 1, 'month': '2025-01', 'desired_shifts': 7, **fields}
+    return validate_preference_row(row, None, {1: DOCTOR}, {'AB': DOCTOR})
+
+@pytest.mark.parametrize('value', [5, {'2025-01-02': True}, ['2025-01-02', 3], True])
+def test_dates_must_be_a_list_of_strings(value):
+    values, error = validate(unavailable=value)
+    assert values is None
+    assert error == 'unavailable must be a list of YYYY-MM-DD dates'
+
+@pytest.mark.parametrize('value', [7.9, True, 'seven', [7]])
+def test_desired_shifts_must_be_an_integer(value):
+    values, error = validate(desired_shifts=value)
+    assert values is None
+    assert error == 'desired_shifts must be an integer'
+
+def test_csv_text_is_accepted():
+    values, error = validate(desired_shifts='7', unavailable='2025-01-03;2025-01-02', preferred='')
+    assert error is None
+    assert values['desired_shifts'] == 7
+    assert values['unavailable'] == ['2025-01-02', '2025-01-03']
+    assert values['preferred'] == []